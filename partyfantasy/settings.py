@@ -47,11 +47,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "store.middleware.CartMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "store.middleware.AnonymousPageCacheMiddleware",
 ]
 
 ROOT_URLCONF = "partyfantasy.urls"
@@ -107,12 +109,58 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# collectstatic writes fingerprinted copies plus staticfiles.json; run
+# optimize_static afterwards to recompress images and write .gz siblings.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": os.environ.get("STATICFILES_BACKEND", "store.static_assets.ManifestStorage"),
+    },
+}
+STATIC_GZIP_EXTENSIONS = [".css", ".js", ".svg", ".json", ".txt", ".xml", ".ico", ".map"]
+# Serve /static/ through Django (gzip siblings, immutable caching) when no
+# web server static mapping is in front of the app.
+SERVE_STATIC = os.environ.get("SERVE_STATIC", "false").lower() in ("true", "1", "yes")
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Serve /media/ through Django (byte ranges, ETag) when no web server maps it.
+# MEDIA_SERVE_MODE "x-accel-redirect" (nginx) or "x-sendfile" (Apache) hands
+# the file back to the front proxy instead of streaming it from Python.
+SERVE_MEDIA = os.environ.get("SERVE_MEDIA", "false").lower() in ("true", "1", "yes")
+MEDIA_SERVE_MODE = os.environ.get("MEDIA_SERVE_MODE", "django").lower()
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get("MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+MEDIA_CACHE_SECONDS = int(os.environ.get("MEDIA_CACHE_SECONDS", "86400"))
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 960, 1280]
+
+# Admin changelists count rows exactly up to this many, then estimate.
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+# Days of sales rollups shown on the admin dashboard.
+DASHBOARD_DAYS = int(os.environ.get("DASHBOARD_DAYS", "30"))
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Shared across WSGI workers by default; set CACHE_BACKEND/CACHE_LOCATION
+# to use memcached or Redis instead.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+    }
+}
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "86400"))
+SITEMAP_PAGE_SIZE = int(os.environ.get("SITEMAP_PAGE_SIZE", "1000"))
+SEARCH_RESULT_LIMIT = int(os.environ.get("SEARCH_RESULT_LIMIT", "200"))
+PAGE_CACHE_STORE = os.environ.get("PAGE_CACHE_STORE", "true").lower() in ("true", "1", "yes")
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", "600"))
+# Bump on deploy to invalidate ETags; defaults to the newest template mtime.
+PAGE_CACHE_RELEASE = os.environ.get("PAGE_CACHE_RELEASE", "")
+# Where carts live: "cookie" (signed cookie), "cache" (shared cache, id in a
+# cookie) or "session" (SESSION_ENGINE, the database by default).
+CART_BACKEND = os.environ.get("CART_BACKEND", "cookie")
+CART_COOKIE_NAME = os.environ.get("CART_COOKIE_NAME", "cart")
+CART_COOKIE_AGE = int(os.environ.get("CART_COOKIE_AGE", str(60 * 60 * 24 * 14)))
+
 if os.environ.get("EMAIL_HOST"):
     EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
     EMAIL_HOST = os.environ.get("EMAIL_HOST")
@@ -128,15 +176,33 @@ ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "tadererak@gmail.com")
 WA_PHONE_NUMBER_ID = os.getenv("WA_PHONE_NUMBER_ID", "")
 WA_ACCESS_TOKEN = os.getenv("WA_ACCESS_TOKEN", "")
 WA_ADMIN_TO = os.getenv("WA_ADMIN_TO", "")
+WA_API_BASE_URL = os.getenv("WA_API_BASE_URL", "https://graph.facebook.com/v19.0")
+WA_HTTP_TIMEOUT = float(os.getenv("WA_HTTP_TIMEOUT", "20"))
+WA_HTTP_POOL_SIZE = int(os.getenv("WA_HTTP_POOL_SIZE", "10"))
+WA_MAX_RETRIES = int(os.getenv("WA_MAX_RETRIES", "3"))
+
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get("NOTIFICATION_MAX_ATTEMPTS", "8"))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.environ.get("NOTIFICATION_RETRY_BASE_SECONDS", "30"))
+NOTIFICATION_RETRY_MAX_SECONDS = int(os.environ.get("NOTIFICATION_RETRY_MAX_SECONDS", "3600"))
+NOTIFICATION_LEASE_SECONDS = int(os.environ.get("NOTIFICATION_LEASE_SECONDS", "120"))
 
 PAYNOW_INTEGRATION_ID = os.environ.get("PAYNOW_INTEGRATION_ID", "")
 PAYNOW_INTEGRATION_KEY = os.environ.get("PAYNOW_INTEGRATION_KEY", "")
 PAYNOW_RETURN_URL = os.environ.get("PAYNOW_RETURN_URL", "")
 PAYNOW_RESULT_URL = os.environ.get("PAYNOW_RESULT_URL", "")
+PAYNOW_BACKEND = os.environ.get("PAYNOW_BACKEND", "live")
+PAYNOW_HTTP_TIMEOUT = float(os.environ.get("PAYNOW_HTTP_TIMEOUT", "30"))
+PAYNOW_HTTP_POOL_SIZE = int(os.environ.get("PAYNOW_HTTP_POOL_SIZE", "10"))
+PAYNOW_FAKE_OUTCOME = os.environ.get("PAYNOW_FAKE_OUTCOME", "paid")
+PAYNOW_FAKE_LATENCY = float(os.environ.get("PAYNOW_FAKE_LATENCY", "0"))
+PAYNOW_FAKE_ERROR = os.environ.get("PAYNOW_FAKE_ERROR", "")
+PAYNOW_STATUS_CACHE_TTL = int(os.environ.get("PAYNOW_STATUS_CACHE_TTL", "5"))
+PAYNOW_STATUS_WAIT_TIMEOUT = int(os.environ.get("PAYNOW_STATUS_WAIT_TIMEOUT", "30"))
 
 UNFOLD = {
     "SITE_TITLE": "Party Fantasy ZW Admin",
     "SITE_HEADER": "Party Fantasy ZW Admin",
+    "DASHBOARD_CALLBACK": "store.dashboard.dashboard_callback",
     "THEME": "dark",
     "COLORS": {
         "primary": {
@@ -1,14 +1,17 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from store.views import media_file, static_asset
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("store.urls")),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+if settings.DEBUG or settings.SERVE_MEDIA:
+    urlpatterns += [re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"), media_file)]
+
+if settings.DEBUG or settings.SERVE_STATIC:
+    urlpatterns += [re_path(r"^%s(?P<path>.*)$" % settings.STATIC_URL.lstrip("/"), static_asset)]
 
@@ -1,7 +1,15 @@
+from datetime import timedelta
+
 from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
 from unfold.admin import ModelAdmin
-from .models import Category, Product, SiteSetting, Order, OrderItem, GalleryItem, Review, ContactMessage
+from . import exports
+from .models import Category, Product, SiteSetting, Order, OrderItem, GalleryItem, Review, ContactMessage, Notification
 
 
 class CategoryAdmin(ModelAdmin):
@@ -24,16 +32,130 @@ class SiteSettingAdmin(ModelAdmin):
         return super().has_add_permission(request)
 
 
+class EstimatedCountPaginator(Paginator):
+    # Exact counts up to ADMIN_EXACT_COUNT_LIMIT rows. Past that, an
+    # unfiltered changelist reports the highest id and a filtered one stops
+    # at the limit, so paging never counts a whole large table.
+    #
+    # Known trade-offs: deleted rows leave id gaps, so the highest id can
+    # overshoot and the last few page links run past the data; page() clamps
+    # those to the real last page, at the cost of one exact count on that
+    # rare request. A filtered list past the limit under-reports instead, and
+    # its pages beyond the limit are not linked.
+    estimated = False
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list.order_by()
+        counted = queryset[: limit + 1].count()
+        if counted <= limit:
+            return counted
+        self.estimated = True
+        if not queryset.query.where:
+            return queryset.aggregate(highest=Max("pk"))["highest"] or counted
+        return limit
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated and page.number > 1 and not page.object_list:
+            self.__dict__["count"] = self.object_list.count()
+            self.__dict__.pop("num_pages", None)
+            self.estimated = False
+            page = super().page(self.num_pages)
+        return page
+
+
+class DateProbeQuerySet(QuerySet):
+    # Backs the admin date_hierarchy without the stock datetimes(), which
+    # truncates every row (a Python function per row on SQLite). Small
+    # result sets (e.g. a search) are bucketed from one read of the column;
+    # large ones probe each candidate year/month/day with an EXISTS on a
+    # created_at range, which the indexes answer with a seek.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._date_values = {}
+
+    def _values_if_small(self, field_name):
+        if field_name not in self._date_values:
+            limit = settings.ADMIN_EXACT_COUNT_LIMIT
+            values = list(self.order_by().values_list(field_name, flat=True)[: limit + 1])
+            self._date_values[field_name] = values if len(values) <= limit else None
+        return self._date_values[field_name]
+
+    def aggregate(self, *args, **kwargs):
+        # The hierarchy asks for Min and Max together, which SQLite answers
+        # with a full scan; one query per aggregate uses the index instead.
+        if args or len(kwargs) < 2 or not all(isinstance(a, (Min, Max)) for a in kwargs.values()):
+            return super().aggregate(*args, **kwargs)
+        result = {}
+        for name, expression in kwargs.items():
+            field_name = getattr(expression.source_expressions[0], "name", None)
+            values = self._values_if_small(field_name) if field_name else None
+            if values is None:
+                result.update(super().aggregate(**{name: expression}))
+            else:
+                pick = min if isinstance(expression, Min) else max
+                result[name] = pick((v for v in values if v is not None), default=None)
+        return result
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        tz = tzinfo or timezone.get_current_timezone()
+        values = self._values_if_small(field_name)
+        if values is not None:
+            periods = sorted({_period_start(timezone.localtime(v, tz), kind) for v in values if v is not None})
+        else:
+            bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+            if bounds["first"] is None:
+                return []
+            periods = []
+            start = _period_start(timezone.localtime(bounds["first"], tz), kind)
+            last = timezone.localtime(bounds["last"], tz)
+            while start <= last:
+                end = _next_period(start, kind)
+                if self.filter(**{f"{field_name}__gte": start, f"{field_name}__lt": end}).exists():
+                    periods.append(start)
+                start = end
+        return periods if order == "ASC" else periods[::-1]
+
+
+def _period_start(value, kind):
+    if kind == "year":
+        return value.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if kind == "month":
+        return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_period(start, kind):
+    naive = start.replace(tzinfo=None)
+    if kind == "year":
+        naive = naive.replace(year=naive.year + 1)
+    elif kind == "month":
+        naive = (naive.replace(day=28) + timedelta(days=4)).replace(day=1)
+    else:
+        naive = naive + timedelta(days=1)
+    return timezone.make_aware(naive, start.tzinfo)
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
     readonly_fields = ["product", "qty", "unit_price", "line_total"]
+    raw_id_fields = ["product"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product")
 
 
 class OrderAdmin(ModelAdmin):
     list_display = ["reference", "status", "total", "created_at"]
     list_filter = ["status", "created_at"]
     search_fields = ["reference", "full_name", "email", "phone"]
+    date_hierarchy = "created_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only_fields = ["id", "reference", "status", "total", "created_at"]
     readonly_fields = [
         "reference",
         "subtotal",
@@ -46,6 +168,30 @@ class OrderAdmin(ModelAdmin):
         "paynow_redirect_url",
     ]
     inlines = [OrderItemInline]
+    actions = ["export_csv", "export_jsonl"]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name == "store_order_changelist":
+            queryset = queryset.only(*self.list_only_fields)
+            if self.date_hierarchy:
+                queryset = DateProbeQuerySet(model=queryset.model, query=queryset.query, using=queryset.db)
+        return queryset
+
+    def _export(self, queryset, fmt):
+        # Streams the selection (or, with "select all", everything the current
+        # filters match) instead of building the file in memory.
+        filename = f"orders-{timezone.localtime():%Y%m%d-%H%M%S}"
+        return exports.export_response(exports.export_queryset(queryset), fmt, filename)
+
+    @admin.action(description="Export selected orders as CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, "csv")
+
+    @admin.action(description="Export selected orders as JSON lines")
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, "jsonl")
 
 
 class GalleryItemForm(forms.ModelForm):
@@ -112,3 +258,28 @@ class ReviewAdmin(ModelAdmin):
 
 admin.site.register(Review, ReviewAdmin)
 
+
+class NotificationAdmin(ModelAdmin):
+    list_display = ["kind", "order", "status", "attempts", "next_attempt_at", "created_at"]
+    list_filter = ["status", "kind"]
+    search_fields = ["order__reference", "last_error"]
+    readonly_fields = ["order", "kind", "status", "attempts", "next_attempt_at", "last_error", "created_at", "sent_at"]
+    actions = ["retry_notifications"]
+    list_select_related = ["order"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected notifications")
+    def retry_notifications(self, request, queryset):
+        updated = queryset.exclude(status=Notification.STATUS_SENT).update(
+            status=Notification.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} notification(s) queued for retry.")
+
+
+admin.site.register(Notification, NotificationAdmin)
@@ -0,0 +1,219 @@
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+CART_SESSION_KEY = "cart"
+CART_COUNT_SESSION_KEY = "cart_count"
+CART_SUMMARY_SESSION_KEY = "cart_summary"
+SIGNING_SALT = "store.carts"
+
+
+class SessionCartStore:
+    # The cart in request.session, so wherever SESSION_ENGINE keeps it (the
+    # django_session table by default). Reads never write, and a browser
+    # without a session cookie is not given a session until it adds to the
+    # cart, so bots and first page views create no django_session rows.
+    def __init__(self, request):
+        self.request = request
+
+    def _has_session(self):
+        session = self.request.session
+        return session.session_key is not None or session.modified
+
+    def load(self):
+        if not self._has_session():
+            return {}
+        return dict(self.request.session.get(CART_SESSION_KEY) or {})
+
+    def save(self, cart):
+        session = self.request.session
+        session[CART_SESSION_KEY] = cart
+        session[CART_COUNT_SESSION_KEY] = sum(cart.values())
+        session.pop(CART_SUMMARY_SESSION_KEY, None)
+        session.modified = True
+
+    def count(self):
+        if not self._has_session():
+            return 0
+        count = self.request.session.get(CART_COUNT_SESSION_KEY)
+        if count is None:
+            count = sum(self.load().values())
+        return count
+
+    def clear(self):
+        if not self._has_session():
+            return
+        session = self.request.session
+        for key in (CART_SESSION_KEY, CART_COUNT_SESSION_KEY, CART_SUMMARY_SESSION_KEY):
+            if key in session:
+                del session[key]
+                session.modified = True
+
+    def get_summary(self):
+        if not self._has_session():
+            return None
+        return self.request.session.get(CART_SUMMARY_SESSION_KEY)
+
+    def set_summary(self, data):
+        # Only alongside a saved cart, never as the first thing in a session.
+        if self._has_session() and CART_SESSION_KEY in self.request.session:
+            self.request.session[CART_SUMMARY_SESSION_KEY] = data
+
+    def process_response(self, response):
+        pass
+
+
+class _CookieStore:
+    # Shared cookie handling: the signed value is read once, and the cookie
+    # is only set or deleted when the cart changed.
+    def __init__(self, request):
+        self.request = request
+        self.cart = None
+        self.accessed = False
+        self.changed = False
+
+    def _cookie(self):
+        self.accessed = True
+        raw = self.request.COOKIES.get(settings.CART_COOKIE_NAME)
+        if not raw:
+            return None
+        try:
+            return signing.Signer(salt=SIGNING_SALT).unsign(raw)
+        except signing.BadSignature:
+            return None
+
+    def _set_cookie(self, response, value):
+        response.set_cookie(
+            settings.CART_COOKIE_NAME,
+            signing.Signer(salt=SIGNING_SALT).sign(value),
+            max_age=settings.CART_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+
+    def count(self):
+        return sum(self.load().values())
+
+    def process_response(self, response):
+        if self.accessed:
+            patch_vary_headers(response, ("Cookie",))
+
+
+def encode_cart(cart):
+    # "12.10|7.20": product id and quantity pairs, cookie-safe without
+    # quoting and ordered so equal carts encode the same.
+    return "|".join(f"{pk}.{qty}" for pk, qty in sorted(cart.items(), key=lambda item: int(item[0])) if qty > 0)
+
+
+def decode_cart(value):
+    cart = {}
+    for pair in (value or "").split("|"):
+        pk, _sep, qty = pair.partition(".")
+        if pk.isdigit() and qty.isdigit() and int(qty) > 0:
+            cart[pk] = int(qty)
+    return cart
+
+
+class CookieCartStore(_CookieStore):
+    # The whole cart in one signed cookie; the priced summary goes to the
+    # shared cache keyed by the cart contents. Never touches the database.
+    def load(self):
+        if self.cart is None:
+            self.cart = decode_cart(self._cookie())
+        return self.cart
+
+    def save(self, cart):
+        self.cart = cart
+        self.changed = True
+
+    def clear(self):
+        if self.load():
+            self.save({})
+
+    def _summary_key(self):
+        return "cart:summary:" + hashlib.sha256(encode_cart(self.load()).encode("utf-8")).hexdigest()
+
+    def get_summary(self):
+        return cache.get(self._summary_key())
+
+    def set_summary(self, data):
+        cache.set(self._summary_key(), data, settings.CART_COOKIE_AGE)
+
+    def process_response(self, response):
+        super().process_response(response)
+        if not self.changed:
+            return
+        value = encode_cart(self.cart)
+        if value:
+            self._set_cookie(response, value)
+        else:
+            response.delete_cookie(settings.CART_COOKIE_NAME, samesite="Lax")
+
+
+class CacheCartStore(_CookieStore):
+    # The cart and its summary in the shared cache under a random id that
+    # the signed cookie carries.
+    def __init__(self, request):
+        super().__init__(request)
+        self.cart_id = None
+        self.entry = None
+
+    def _key(self):
+        return f"cart:{self.cart_id}"
+
+    def _load_entry(self):
+        if self.entry is None:
+            self.cart_id = self._cookie()
+            self.entry = (cache.get(self._key()) if self.cart_id else None) or {"cart": {}, "summary": None}
+        return self.entry
+
+    def _write(self):
+        if not self.cart_id:
+            self.cart_id = secrets.token_urlsafe(18)
+            self.changed = True
+        cache.set(self._key(), self.entry, settings.CART_COOKIE_AGE)
+
+    def load(self):
+        return self._load_entry()["cart"]
+
+    def save(self, cart):
+        self._load_entry()
+        self.entry = {"cart": cart, "summary": None}
+        self._write()
+
+    def clear(self):
+        if self.load():
+            cache.delete(self._key())
+            self.entry = {"cart": {}, "summary": None}
+
+    def get_summary(self):
+        return self._load_entry()["summary"]
+
+    def set_summary(self, data):
+        self._load_entry()["summary"] = data
+        if self.cart_id:
+            cache.set(self._key(), self.entry, settings.CART_COOKIE_AGE)
+
+    def process_response(self, response):
+        super().process_response(response)
+        if self.changed:
+            self._set_cookie(response, self.cart_id)
+
+
+BACKENDS = {
+    "session": SessionCartStore,
+    "cookie": CookieCartStore,
+    "cache": CacheCartStore,
+}
+
+
+def get_store(request):
+    store = getattr(request, "_cart_store", None)
+    if store is None:
+        store = request._cart_store = BACKENDS[settings.CART_BACKEND](request)
+    return store
@@ -0,0 +1,54 @@
+from . import search, versions
+from .models import Category, Product
+
+FEATURED_LIMIT = 6
+
+
+def get_version():
+    return versions.get_version("catalog")
+
+
+def bump_version():
+    return versions.bump_version("catalog")
+
+
+def _cached(name, build, *parts):
+    return versions.cached("catalog", name, build, *parts)
+
+
+def _active_products():
+    return Product.objects.filter(is_active=True).select_related("category")
+
+
+def featured_products():
+    return _cached("featured", lambda: list(_active_products().order_by("-created_at")[:FEATURED_LIMIT]))
+
+
+def featured_min_price():
+    return min((p.price for p in featured_products()), default=None)
+
+
+def categories():
+    return _cached("categories", lambda: list(Category.objects.all().order_by("name")))
+
+
+def category_exists(slug):
+    return any(c.slug == slug for c in categories())
+
+
+def product_by_slug(slug):
+    # Cached as a one-element list so a missing product is cached too.
+    found = _cached("product", lambda: list(_active_products().filter(slug=slug)[:1]), slug)
+    return found[0] if found else None
+
+
+def product_list(query="", category_slug=""):
+    def build():
+        if query:
+            return search.search_products(query, category_slug)
+        products = _active_products()
+        if category_slug:
+            products = products.filter(category__slug=category_slug)
+        return list(products.order_by("name"))
+
+    return _cached("list", build, query, category_slug)
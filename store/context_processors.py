@@ -1,12 +1,10 @@
 from django.urls import reverse
 
-from .utils import get_cart
+from .utils import get_cart_count
 
 
 def cart(request):
-    cart = get_cart(request)
-    count = sum(cart.values())
-    return {"cart_item_count": count}
+    return {"cart_item_count": get_cart_count(request)}
 
 
 def back_nav(request):
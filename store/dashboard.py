@@ -0,0 +1,94 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySalesSummary, Order
+
+TOP_PRODUCTS = 10
+STATUS_COLORS = {
+    Order.STATUS_PAID: "#16a34a",
+    Order.STATUS_PENDING: "#f59e0b",
+    Order.STATUS_CREATED: "#94a3b8",
+    Order.STATUS_FAILED: "#dc2626",
+}
+
+
+def _money(value):
+    return f"${(value or Decimal('0')):,.2f}"
+
+
+def dashboard_callback(request, context):
+    # Reads only the rollup tables, so the dashboard costs the same however
+    # many orders there are.
+    today = timezone.localdate()
+    days = [today - timedelta(days=n) for n in range(settings.DASHBOARD_DAYS - 1, -1, -1)]
+    rows = list(
+        DailySalesSummary.objects.filter(date__gte=days[0]).values("date", "status", "delivery_method", "order_count", "revenue")
+    )
+
+    per_status = {status: {"orders": 0, "revenue": Decimal("0")} for status, _label in Order.STATUS_CHOICES}
+    per_day = {(day, status): 0 for day in days for status in per_status}
+    revenue_per_day = dict.fromkeys(days, Decimal("0"))
+    per_delivery = {}
+    for row in rows:
+        totals = per_status.setdefault(row["status"], {"orders": 0, "revenue": Decimal("0")})
+        totals["orders"] += row["order_count"]
+        totals["revenue"] += row["revenue"]
+        per_day[(row["date"], row["status"])] = per_day.get((row["date"], row["status"]), 0) + row["order_count"]
+        if row["status"] == Order.STATUS_PAID:
+            revenue_per_day[row["date"]] += row["revenue"]
+            method = row["delivery_method"] or "—"
+            per_delivery[method] = per_delivery.get(method, 0) + row["order_count"]
+
+    labels = [day.strftime("%d %b") for day in days]
+    revenue_chart = {
+        "labels": labels,
+        "datasets": [{"label": "Paid revenue", "data": [float(revenue_per_day[day]) for day in days], "backgroundColor": "#db2777"}],
+    }
+    orders_chart = {
+        "labels": labels,
+        "datasets": [
+            {
+                "label": label,
+                "data": [per_day.get((day, status), 0) for day in days],
+                "borderColor": STATUS_COLORS.get(status),
+                "backgroundColor": STATUS_COLORS.get(status),
+            }
+            for status, label in Order.STATUS_CHOICES
+        ],
+    }
+
+    top_products = (
+        DailyProductSales.objects.filter(date__gte=days[0])
+        .values("product__name")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+        .order_by("-quantity")[:TOP_PRODUCTS]
+    )
+
+    paid = per_status[Order.STATUS_PAID]
+    context.update(
+        {
+            "dashboard_days": settings.DASHBOARD_DAYS,
+            "dashboard_cards": [
+                {"title": "Paid revenue", "value": _money(paid["revenue"])},
+                {"title": "Paid orders", "value": paid["orders"]},
+                {"title": "Pending orders", "value": per_status[Order.STATUS_PENDING]["orders"]},
+                {"title": "Failed orders", "value": per_status[Order.STATUS_FAILED]["orders"]},
+            ],
+            "revenue_chart": json.dumps(revenue_chart),
+            "orders_chart": json.dumps(orders_chart),
+            "top_products_table": {
+                "headers": ["Product", "Quantity", "Revenue"],
+                "rows": [[row["product__name"], row["quantity"], _money(row["revenue"])] for row in top_products],
+            },
+            "delivery_table": {
+                "headers": ["Delivery method", "Paid orders"],
+                "rows": [[method, count] for method, count in sorted(per_delivery.items(), key=lambda item: -item[1])],
+            },
+        }
+    )
+    return context
@@ -0,0 +1,107 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+
+from .models import Order, OrderItem
+
+CHUNK_SIZE = 1000
+ORDER_FIELDS = [
+    "id",
+    "reference",
+    "status",
+    "created_at",
+    "full_name",
+    "phone",
+    "email",
+    "theme",
+    "child_name",
+    "age",
+    "collection_date",
+    "toy_preference",
+    "delivery_method",
+    "delivery_address",
+    "subtotal",
+    "delivery_fee",
+    "total",
+    "paynow_reference",
+]
+ITEM_FIELDS = ["product_id", "product_name", "qty", "unit_price", "line_total"]
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+
+def export_queryset(queryset=None, since=None, until=None, statuses=None):
+    # Oldest first with a stable tiebreak, only the exported columns, and the
+    # items (with their product name) prefetched per chunk of orders.
+    queryset = Order.objects.all() if queryset is None else queryset
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__lt=until)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    items = OrderItem.objects.select_related("product").only(
+        "order_id", "product_id", "product__name", "qty", "unit_price", "line_total"
+    ).order_by("id")
+    return queryset.only(*ORDER_FIELDS).order_by("created_at", "id").prefetch_related(Prefetch("items", queryset=items))
+
+
+def _order_values(order):
+    return {field: getattr(order, field) for field in ORDER_FIELDS}
+
+
+def _item_values(item):
+    return {
+        "product_id": item.product_id,
+        "product_name": item.product.name,
+        "qty": item.qty,
+        "unit_price": item.unit_price,
+        "line_total": item.line_total,
+    }
+
+
+class _Line:
+    # csv.writer target that hands back each row instead of buffering it.
+    def write(self, value):
+        return value
+
+
+def csv_lines(queryset, chunk_size=CHUNK_SIZE):
+    # One row per order item; an order without items still gets one row.
+    writer = csv.writer(_Line())
+    yield writer.writerow(ORDER_FIELDS + ITEM_FIELDS)
+    blank = [""] * len(ITEM_FIELDS)
+    for order in queryset.iterator(chunk_size=chunk_size):
+        values = list(_order_values(order).values())
+        items = order.items.all()
+        if not items:
+            yield writer.writerow(values + blank)
+        for item in items:
+            yield writer.writerow(values + list(_item_values(item).values()))
+
+
+def jsonl_lines(queryset, chunk_size=CHUNK_SIZE):
+    # One JSON object per order, with its items nested.
+    for order in queryset.iterator(chunk_size=chunk_size):
+        row = _order_values(order)
+        row["items"] = [_item_values(item) for item in order.items.all()]
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def lines(queryset, fmt, chunk_size=CHUNK_SIZE):
+    if fmt == "csv":
+        return csv_lines(queryset, chunk_size)
+    if fmt == "jsonl":
+        return jsonl_lines(queryset, chunk_size)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_response(queryset, fmt, filename):
+    response = StreamingHttpResponse(lines(queryset, fmt), content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,105 @@
+import base64
+import binascii
+from collections import Counter
+from datetime import datetime
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import versions
+from .models import Review, ReviewStats
+
+PAGE_SIZE = 10
+FEATURED_LIMIT = 3
+STATS_PK = 1
+
+
+def encode_cursor(review):
+    raw = f"{review.created_at.isoformat()}|{review.pk}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def _visible():
+    return Review.objects.filter(is_visible=True).order_by("-created_at", "-id")
+
+
+def page_queryset(cursor=""):
+    # Keyset pagination on (created_at, id): each page seeks past the last
+    # row of the previous one, so it costs the same however deep it is.
+    queryset = _visible()
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        # Written as a range on created_at (not an OR) so the index seeks
+        # straight to the cursor instead of walking down from the newest row.
+        queryset = queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, pk__gte=pk)
+    return queryset[: PAGE_SIZE + 1]
+
+
+def page(cursor=""):
+    rows = list(page_queryset(cursor))
+    next_cursor = encode_cursor(rows[PAGE_SIZE - 1]) if len(rows) > PAGE_SIZE else ""
+    return rows[:PAGE_SIZE], next_cursor
+
+
+def _cached(name, build):
+    return versions.cached("reviews", name, build)
+
+
+def first_page():
+    return _cached("first_page", page)
+
+
+def featured():
+    return _cached("featured", lambda: list(_visible()[:FEATURED_LIMIT]))
+
+
+def get_stats():
+    return _cached("stats", lambda: ReviewStats.objects.filter(pk=STATS_PK).first() or rebuild_stats())
+
+
+def rebuild_stats():
+    totals = Review.objects.filter(is_visible=True).aggregate(
+        visible_count=Count("id"),
+        rating_count=Count("rating"),
+        rating_total=Sum("rating"),
+        **{f"stars_{i}": Count("id", filter=Q(rating=i)) for i in range(1, 6)},
+    )
+    totals["rating_total"] = totals["rating_total"] or 0
+    stats, _ = ReviewStats.objects.update_or_create(pk=STATS_PK, defaults=totals)
+    return stats
+
+
+def _counts(state):
+    is_visible, rating = state
+    if not is_visible:
+        return {}
+    counts = {"visible_count": 1}
+    if rating:
+        counts.update({"rating_count": 1, "rating_total": rating, f"stars_{rating}": 1})
+    return counts
+
+
+def apply_change(before, after):
+    # before/after are Review.stats_state() tuples, or None for a review that
+    # did not exist. Adds the difference to the stats row in one UPDATE.
+    changes = Counter(_counts(after) if after else {})
+    changes.subtract(_counts(before) if before else {})
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes:
+        return
+    updated = ReviewStats.objects.filter(pk=STATS_PK).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + delta for field, delta in changes.items()},
+    )
+    if not updated:
+        rebuild_stats()
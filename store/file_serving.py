@@ -0,0 +1,154 @@
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    # Reads only [start, start + length) of an open file. It has no fileno(),
+    # so the WSGI server streams it in blocks instead of sendfile()-ing the
+    # whole file.
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    # Returns the inclusive (start, end) of a single byte range, or None when
+    # the whole file should be sent (no header, several ranges or a syntax
+    # error, all of which RFC 9110 lets us answer with a 200).
+    match = RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return "*" in etags or etag in etags
+    if_modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _range_applies(request, etag, last_modified):
+    # If-Range: only honour Range when the client's copy is still current.
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return if_range == last_modified
+
+
+def serve_file(request, fullpath, cache_control, gzip=False):
+    # Serves a file with ETag/Last-Modified revalidation and single byte-range
+    # support. With gzip=True a precompressed .gz sibling is used for clients
+    # that accept it (ranges always address the uncompressed file).
+    content_type, _encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+    range_header = request.META.get("HTTP_RANGE")
+    serve_path = fullpath
+    encoding = None
+    if (
+        gzip
+        and not range_header
+        and "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        and os.path.isfile(fullpath + ".gz")
+    ):
+        serve_path = fullpath + ".gz"
+        encoding = "gzip"
+
+    stat = os.stat(serve_path)
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        byte_range = None
+        if range_header and encoding is None and _range_applies(request, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response.headers["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+        f = open(serve_path, "rb")
+        if byte_range is None:
+            # A plain file keeps its fileno(), so wsgi.file_wrapper can sendfile() it.
+            response = FileResponse(f, content_type=content_type)
+            response.headers["Content-Length"] = str(stat.st_size)
+        else:
+            start, end = byte_range
+            response = FileResponse(FileRange(f, start, end - start + 1), content_type=content_type)
+            response.status_code = 206
+            response.block_size = RANGE_BLOCK_SIZE
+            response.headers["Content-Length"] = str(end - start + 1)
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response.headers["Accept-Ranges"] = "bytes"
+
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = last_modified
+    response.headers["Cache-Control"] = cache_control
+    if gzip:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def offload_response(fullpath, name, mode, accel_prefix):
+    # Lets a front proxy send the file: nginx reads X-Accel-Redirect (an
+    # internal location), Apache/lighttpd read X-Sendfile (a filesystem path).
+    # The proxy then handles Range, If-Range and sendfile() itself.
+    content_type, _encoding = mimetypes.guess_type(fullpath)
+    response = HttpResponse(content_type=content_type or "application/octet-stream")
+    if mode == "x-accel-redirect":
+        response.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + name.lstrip("/")
+    else:
+        response.headers["X-Sendfile"] = fullpath
+    return response
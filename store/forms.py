@@ -28,6 +28,7 @@ class CheckoutForm(forms.Form):
     full_name = forms.CharField(max_length=255, required=False, widget=forms.TextInput(attrs={"class": input_class}))
     phone = forms.CharField(max_length=50, required=False, widget=forms.TextInput(attrs={"class": input_class}))
     email = forms.EmailField(required=False, widget=forms.EmailInput(attrs={"class": input_class}))
+    idempotency_key = forms.CharField(max_length=64, required=False, widget=forms.HiddenInput)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -0,0 +1,10 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def build_session(pool_size=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,82 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# (file extension, Pillow format, save options)
+FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+
+def derivative_name(name, width, ext):
+    root, _ = os.path.splitext(name)
+    return f"{root}-{width}w.{ext}"
+
+
+def _open(name, storage):
+    with storage.open(name, "rb") as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def _save(storage, name, image, fmt, options):
+    if fmt == "JPEG" and image.mode == "RGBA":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    # No exif= argument, so EXIF (camera, GPS) is not copied to the variant.
+    image.save(buffer, fmt, **options)
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_derivatives(name, storage=default_storage):
+    # Writes WebP and JPEG variants next to the original for every configured
+    # width narrower than it. Returns the widths written and the original width.
+    image = _open(name, storage)
+    widths = [w for w in settings.IMAGE_DERIVATIVE_WIDTHS if w < image.width]
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for ext, fmt, options in FORMATS:
+            _save(storage, derivative_name(name, width, ext), resized, fmt, options)
+    return widths, image.width
+
+
+def delete_derivatives(name, widths, storage=default_storage):
+    for width in widths:
+        for ext, _fmt, _options in FORMATS:
+            variant = derivative_name(name, width, ext)
+            if storage.exists(variant):
+                storage.delete(variant)
+
+
+def needs_derivatives(instance):
+    name = instance.image.name if instance.image else ""
+    return bool(name) and (instance.image_variants or {}).get("source") != name
+
+
+def update_derivatives(instance):
+    # Regenerates variants when the image file changed since the last run and
+    # records them with a queryset update, so no save signals fire again.
+    if not needs_derivatives(instance):
+        return False
+    previous = instance.image_variants or {}
+    if previous.get("source"):
+        delete_derivatives(previous["source"], previous.get("widths", []))
+    widths, original_width = generate_derivatives(instance.image.name)
+    variants = {"source": instance.image.name, "widths": widths, "width": original_width}
+    type(instance).objects.filter(pk=instance.pk).update(image_variants=variants)
+    instance.image_variants = variants
+    return True
@@ -0,0 +1,24 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+BENCH_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@contextmanager
+def throwaway_database():
+    # The bench commands seed and time against a freshly migrated SQLite file
+    # and an in-memory cache, so the configured database and the shared cache
+    # never see a write or hold a lock. A file rather than SQLite's in-memory
+    # test database, so threads' connections share it as real workers do.
+    with tempfile.TemporaryDirectory() as tmp:
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tmp, "bench.sqlite3")
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(CACHES=BENCH_CACHES):
+                yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
@@ -0,0 +1,94 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from store import carts
+from store.management.bench import throwaway_database
+from store.models import Category, Product
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class WriteCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.session = 0
+        self.other = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(WRITE_PREFIXES):
+            with self.lock:
+                if "django_session" in sql:
+                    self.session += 1
+                else:
+                    self.other += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent add-to-cart -> cart -> checkout flows with each cart backend and report checkouts per "
+        "second and database writes. Runs against a throwaway test database and an in-memory cache, so the "
+        "configured database, its notification outbox and the shared cache are never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--checkouts", type=int, default=50, help="Checkouts per thread.")
+        parser.add_argument("--backends", nargs="+", default=["session", "cookie", "cache"], choices=sorted(carts.BACKENDS))
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self._bench(options)
+
+    def _bench(self, options):
+        category = Category.objects.create(name="Bench cart", slug="bench-cart")
+        product = Product.objects.create(category=category, name="Bench cart box", slug="bench-cart-box", price=Decimal("12.00"))
+        self.stdout.write(
+            f"{options['threads']} threads x {options['checkouts']} checkouts\n"
+            f"{'backend':<10}{'checkouts/s':>12}{'errors':>8}{'session writes':>16}{'other writes':>14}"
+        )
+        for backend in options["backends"]:
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=["*"], CART_BACKEND=backend):
+                rate, errors, counter = self._run(backend, product, options["threads"], options["checkouts"])
+            self.stdout.write(f"{backend:<10}{rate:>12.1f}{errors:>8}{counter.session:>16}{counter.other:>14}")
+
+    def _run(self, backend, product, threads, checkouts):
+        counter = WriteCounter()
+        errors = []
+        add_url = reverse("add_to_cart", args=[product.pk])
+        cart_url = reverse("cart")
+        checkout_url = reverse("checkout")
+
+        def customer(worker):
+            with connection.execute_wrapper(counter):
+                for i in range(checkouts):
+                    client = Client()
+                    try:
+                        client.post(add_url, {"qty": "10"})
+                        client.get(cart_url)
+                        client.get(checkout_url)
+                        response = client.post(
+                            checkout_url,
+                            {"delivery_method": "pickup", "full_name": "Bench", "idempotency_key": f"bench-cart-{backend}-{worker}-{i}"},
+                        )
+                        if response.status_code != 302 or "/received/" not in response["Location"]:
+                            errors.append(response.status_code)
+                    except OperationalError as e:
+                        errors.append(str(e))
+            connection.close()
+
+        workers = [threading.Thread(target=customer, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        return (threads * checkouts - len(errors)) / elapsed, len(errors), counter
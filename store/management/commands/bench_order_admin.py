@@ -0,0 +1,114 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from unfold.admin import ModelAdmin
+
+from store.admin import OrderAdmin
+from store.management.bench import throwaway_database
+from store.models import Order
+
+STATUSES = [Order.STATUS_CREATED, Order.STATUS_PENDING, Order.STATUS_PAID, Order.STATUS_FAILED]
+
+
+class Command(BaseCommand):
+    help = "Time the order admin changelist on a synthetic order table in a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=500000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        now = timezone.now()
+        year = (now - timedelta(days=100)).year
+        urls = [
+            ("all", ""),
+            ("status=PAID", "?status__exact=PAID"),
+            (f"year={year}", f"?created_at__year={year}"),
+            ("page 200", "?p=200"),
+            ("search ref", "?q=BENCH-0001234"),
+            ("search ref, year", f"?q=BENCH-0001234&created_at__year={year}"),
+        ]
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=["*"]):
+            started = time.perf_counter()
+            batch = []
+            for i in range(options["orders"]):
+                total = Decimal(rng.randint(10, 400))
+                batch.append(
+                    Order(
+                        reference=f"BENCH-{i:07d}",
+                        full_name=f"Customer {i}",
+                        status=rng.choice(STATUSES),
+                        subtotal=total,
+                        total=total,
+                    )
+                )
+                if len(batch) == 5000:
+                    Order.objects.bulk_create(batch)
+                    batch = []
+            Order.objects.bulk_create(batch)
+            # auto_now_add ignores the value passed in, so spread the dates afterwards.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE store_order SET created_at = datetime(%s, '-' || (id %% 730) || ' days') WHERE reference LIKE %s",
+                    [now.strftime("%Y-%m-%d %H:%M:%S"), "BENCH-%"],
+                )
+            self.stdout.write(f"Seeded {options['orders']} orders in {time.perf_counter() - started:.1f}s")
+
+            user = get_user_model().objects.create_superuser("bench-admin", "bench@example.com", "bench")
+            client = Client()
+            client.force_login(user)
+
+            self.stdout.write(f"{'changelist':<18}{'stock ms':>10}{'queries':>9}{'tuned ms':>10}{'queries':>9}")
+            for label, query in urls:
+                url = "/admin/store/order/" + query
+                with self._stock_admin():
+                    stock_ms, stock_queries = self._time(client, url, options["repeat"])
+                tuned_ms, tuned_queries = self._time(client, url, options["repeat"])
+                self.stdout.write(f"{label:<18}{stock_ms:>10.1f}{stock_queries:>9}{tuned_ms:>10.1f}{tuned_queries:>9}")
+
+    def _stock_admin(self):
+        # Same changelist with Django's defaults: exact Paginator, a second
+        # full-table count, every column selected and the stock date_hierarchy.
+        return override_attributes(
+            OrderAdmin,
+            paginator=Paginator,
+            show_full_result_count=True,
+            get_queryset=ModelAdmin.get_queryset,
+        )
+
+    def _time(self, client, url, repeat):
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                response = client.get(url)
+                assert response.status_code == 200, response.status_code
+            elapsed = (time.perf_counter() - started) * 1000 / repeat
+        return elapsed, len(queries) // repeat
+
+
+class override_attributes:
+    def __init__(self, cls, **attributes):
+        self.cls = cls
+        self.attributes = attributes
+        self.saved = {}
+
+    def __enter__(self):
+        for name, value in self.attributes.items():
+            self.saved[name] = self.cls.__dict__.get(name)
+            setattr(self.cls, name, value)
+
+    def __exit__(self, *exc):
+        for name, value in self.saved.items():
+            setattr(self.cls, name, value)
@@ -0,0 +1,98 @@
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from store import exports
+from store.management.bench import throwaway_database
+from store.models import Category, Order, OrderItem, Product
+
+STATUSES = [Order.STATUS_CREATED, Order.STATUS_PENDING, Order.STATUS_PAID, Order.STATUS_FAILED]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare peak memory of the streaming order export with serializing everything at once, on a throwaway "
+        "database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200000)
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000], help="Smaller export sizes to measure as well.")
+        parser.add_argument("--skip-baseline-over", type=int, default=50000, help="Do not run the in-memory baseline above this many orders.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        sizes = sorted({size for size in options["sizes"] if size < options["orders"]} | {options["orders"]})
+        # DEBUG keeps the SQL of every query, which would swamp the numbers.
+        with throwaway_database(), override_settings(DEBUG=False):
+            started = time.perf_counter()
+            category = Category.objects.create(name="Bench export", slug=f"bench-export-{rng.getrandbits(32):x}")
+            products = Product.objects.bulk_create(
+                [
+                    Product(category=category, name=f"Bench box {i}", slug=f"bench-export-{i}-{rng.getrandbits(32):x}", price=Decimal(10 + i))
+                    for i in range(50)
+                ]
+            )
+            for offset in range(0, options["orders"], 5000):
+                orders = Order.objects.bulk_create(
+                    [
+                        Order(
+                            reference=f"EXPORT-{i:08d}",
+                            full_name=f"Customer {i}",
+                            phone="+263770000000",
+                            email=f"customer{i}@example.com",
+                            status=rng.choice(STATUSES),
+                            delivery_method=rng.choice(["pickup", "delivery"]),
+                            subtotal=Decimal("30.00"),
+                            total=Decimal("30.00"),
+                        )
+                        for i in range(offset, min(offset + 5000, options["orders"]))
+                    ]
+                )
+                OrderItem.objects.bulk_create(
+                    [
+                        OrderItem(order=order, product=rng.choice(products), qty=1, unit_price=Decimal("15.00"), line_total=Decimal("15.00"))
+                        for order in orders
+                        for _ in range(2)
+                    ]
+                )
+            self.stdout.write(f"Seeded {options['orders']} orders with 2 items each in {time.perf_counter() - started:.1f}s")
+
+            self.stdout.write(f"{'orders':>10}{'csv peak MB':>13}{'jsonl peak MB':>15}{'in-memory MB':>14}{'csv s':>8}")
+            for size in sizes:
+                pks = Order.objects.filter(reference__startswith="EXPORT-").order_by("id").values_list("id", flat=True)
+                last_pk = pks[size - 1]
+                queryset = exports.export_queryset(Order.objects.filter(reference__startswith="EXPORT-", pk__lte=last_pk))
+                csv_peak, csv_seconds = self._measure(lambda: self._drain(exports.lines(queryset, "csv")))
+                jsonl_peak, _ = self._measure(lambda: self._drain(exports.lines(queryset, "jsonl")))
+                if size <= options["skip_baseline_over"]:
+                    baseline_peak, _ = self._measure(lambda: self._in_memory(last_pk))
+                    baseline = f"{baseline_peak:>14.1f}"
+                else:
+                    baseline = f"{'skipped':>14}"
+                self.stdout.write(f"{size:>10}{csv_peak:>13.1f}{jsonl_peak:>15.1f}{baseline}{csv_seconds:>8.1f}")
+
+    def _drain(self, lines):
+        for _line in lines:
+            pass
+
+    def _in_memory(self, last_pk):
+        # What dumpdata into a single data.json amounts to: every object
+        # serialized into one string before anything is written.
+        orders = Order.objects.filter(reference__startswith="EXPORT-", pk__lte=last_pk)
+        items = OrderItem.objects.filter(order__in=orders)
+        return serializers.serialize("json", list(orders) + list(items))
+
+    def _measure(self, run):
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            run()
+            return tracemalloc.get_traced_memory()[1] / (1024 * 1024), time.perf_counter() - started
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from store.management.bench import throwaway_database
+from store.models import Notification, Order
+from store.paynow_gateway import paynow_hash, reset_gateway
+
+BENCH_KEY = "bench-integration-key"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire a burst of signed Paynow result callbacks at the webhook and report how many one worker absorbs per "
+        "second. Runs against a throwaway database and an in-memory cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--retries", type=int, default=3, help="Times Paynow posts each result (it retries on slow replies).")
+        parser.add_argument("--failed-percent", type=int, default=20)
+
+    def handle(self, *args, **options):
+        settings_override = override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=["*"],
+            PAYNOW_BACKEND="live",
+            PAYNOW_INTEGRATION_ID="1",
+            PAYNOW_INTEGRATION_KEY=BENCH_KEY,
+            PAYNOW_RETURN_URL="https://example.com/return/",
+            PAYNOW_RESULT_URL="https://example.com/result/",
+        )
+        # The gateway is built once per process from settings, so drop it
+        # before and after to sign with BENCH_KEY and not keep it around.
+        reset_gateway()
+        try:
+            with throwaway_database(), settings_override:
+                self._bench(options)
+        finally:
+            reset_gateway()
+
+    def _bench(self, options):
+        rng = random.Random(42)
+        Order.objects.bulk_create(
+            [
+                Order(reference=f"HOOK-{i:07d}", status=Order.STATUS_PENDING, total=Decimal("25.00"), paynow_poll_url="https://example.com/poll")
+                for i in range(options["orders"])
+            ]
+        )
+        bodies = []
+        for i in range(options["orders"]):
+            status = "Cancelled" if rng.randrange(100) < options["failed_percent"] else "Paid"
+            body = {
+                "reference": f"HOOK-{i:07d}",
+                "paynowreference": str(900000 + i),
+                "amount": "25.00",
+                "status": status,
+                "pollurl": "https://example.com/poll",
+            }
+            body["hash"] = paynow_hash(body, BENCH_KEY)
+            bodies.extend([body] * options["retries"])
+        rng.shuffle(bodies)
+        notifications_before = Notification.objects.count()
+
+        client = Client()
+        url = reverse("paynow_result")
+        latencies = []
+        started = time.perf_counter()
+        for body in bodies:
+            request_started = time.perf_counter()
+            response = client.post(url, body)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - started
+
+        paid = Order.objects.filter(reference__startswith="HOOK-", status=Order.STATUS_PAID).count()
+        failed = Order.objects.filter(reference__startswith="HOOK-", status=Order.STATUS_FAILED).count()
+        queued = Notification.objects.count() - notifications_before
+        latencies.sort()
+        self.stdout.write(
+            f"{len(bodies)} callbacks for {options['orders']} orders in {elapsed:.2f}s: {len(bodies) / elapsed:.0f} callbacks/s"
+        )
+        self.stdout.write(
+            f"latency ms: median {statistics.median(latencies):.2f}, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f}, max {latencies[-1]:.2f}"
+        )
+        self.stdout.write(
+            f"{paid} paid, {failed} failed; {queued} notifications queued "
+            f"(expected {paid * 3 + failed}, one set per transition)"
+        )
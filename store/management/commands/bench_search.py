@@ -0,0 +1,68 @@
+import random
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store import search
+from store.management.bench import throwaway_database
+from store.models import Category, Product
+
+WORDS = [
+    "party", "box", "spiderman", "princess", "unicorn", "dinosaur", "rainbow", "sonic", "barbie", "racing",
+    "pirate", "mermaid", "football", "space", "jungle", "safari", "frozen", "paw", "patrol", "butterfly",
+    "bronze", "silver", "gold", "platinum", "diamond", "budget", "ultimate", "combo", "chrome", "lithium",
+    "sweets", "chocolates", "juice", "hats", "balloons", "stickers", "colouring", "book", "crayons", "toys",
+]
+QUERIES = ["spiderman", "princess box", "gold", "rain", "party hats", "choc", "dinosaur jungle", "zzz"]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "zo", "bi", "chu", "de", "fa", "go", "hi", "ju", "pe", "so"]
+
+
+class Command(BaseCommand):
+    help = "Compare FTS5 and LIKE product search on a synthetic catalog in a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self._bench(options)
+
+    def _bench(self, options):
+        if not search.fts_available():
+            raise CommandError("The FTS5 search index is not available.")
+        rng = random.Random(42)
+        vocabulary = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+        categories = Category.objects.bulk_create(
+            [Category(name=f"Bench {i}", slug=f"bench-{i}-{rng.getrandbits(32):x}") for i in range(10)]
+        )
+        products = []
+        for i in range(options["products"]):
+            name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+            products.append(
+                Product(
+                    category=rng.choice(categories),
+                    name=name,
+                    slug=f"bench-{i}-{rng.getrandbits(32):x}",
+                    price=Decimal(rng.randint(5, 200)),
+                    description=" ".join(rng.choice(vocabulary + WORDS) for _ in range(30)),
+                )
+            )
+        Product.objects.bulk_create(products, batch_size=1000)
+        search.rebuild_index()
+
+        self.stdout.write(f"{options['products']} products, {options['repeat']} runs per query, FTS capped at {settings.SEARCH_RESULT_LIMIT} rows")
+        self.stdout.write(f"{'query':<18}{'like ms':>10}{'fts ms':>10}{'like rows':>11}{'fts rows':>10}")
+        for query in QUERIES:
+            like_ms, like_rows = self._time(search.fallback_search, query, options["repeat"])
+            fts_ms, fts_rows = self._time(search.search_products, query, options["repeat"])
+            self.stdout.write(f"{query:<18}{like_ms:>10.1f}{fts_ms:>10.1f}{like_rows:>11}{fts_rows:>10}")
+
+    def _time(self, fn, query, repeat):
+        rows = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rows = len(fn(query))
+        return (time.perf_counter() - started) * 1000 / repeat, rows
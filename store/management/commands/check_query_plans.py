@@ -0,0 +1,60 @@
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from store import catalog, feedback, sitemaps
+from store.models import GalleryItem, Notification, Order, Review
+
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+CURSOR_AT = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def hot_queries():
+    # The query shapes the views, admin changelists and workers run on every
+    # request, built through the same helpers where one exists.
+    cursor = feedback.encode_cursor(Review(pk=1, created_at=CURSOR_AT))
+    return [
+        ("home featured products", catalog._active_products().order_by("-created_at")[: catalog.FEATURED_LIMIT]),
+        ("product list", catalog._active_products().order_by("name")),
+        ("sitemap products page", sitemaps._active_products()[: settings.SITEMAP_PAGE_SIZE]),
+        ("reviews first page", feedback.page_queryset()),
+        ("reviews keyset page", feedback.page_queryset(cursor)),
+        ("order admin, all", Order.objects.order_by("-created_at")[:100]),
+        ("order admin, by status", Order.objects.filter(status=Order.STATUS_PAID).order_by("-created_at")[:100]),
+        ("gallery", GalleryItem.objects.order_by("-created_at")),
+        (
+            "due notifications",
+            Notification.objects.filter(status=Notification.STATUS_PENDING, next_attempt_at__lte=timezone.now()).order_by(
+                "next_attempt_at"
+            )[:50],
+        ),
+    ]
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN QUERY PLAN on the hot queries and fail if any does a full table scan or a sort."
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("check_query_plans reads SQLite EXPLAIN QUERY PLAN output.")
+        failures = []
+        for label, queryset in hot_queries():
+            plan = query_plan(queryset)
+            problems = [step for step in plan if FULL_SCAN_RE.match(step) or "TEMP B-TREE" in step]
+            status = self.style.ERROR("FAIL") if problems else self.style.SUCCESS("ok")
+            self.stdout.write(f"{status}  {label}: {'; '.join(plan)}")
+            if problems:
+                failures.append(label)
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries are not index-backed: {', '.join(failures)}")
@@ -0,0 +1,45 @@
+import sys
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from store import exports
+from store.models import Order
+
+
+def _day_start(value, option):
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"{option} must be YYYY-MM-DD")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = "Stream orders and their items to a CSV or JSON lines file, a chunk of orders at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--since", help="First day to include (YYYY-MM-DD, local time).")
+        parser.add_argument("--until", help="Last day to include (YYYY-MM-DD, local time).")
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[status for status, _label in Order.STATUS_CHOICES],
+            help="Only export this status. Repeat for more than one.",
+        )
+        parser.add_argument("--output", "-o", help="File to write. Defaults to stdout.")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = _day_start(options["since"], "--since") if options["since"] else None
+        until = _day_start(options["until"], "--until") + timedelta(days=1) if options["until"] else None
+        queryset = exports.export_queryset(since=since, until=until, statuses=options["status"])
+        output = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for line in exports.lines(queryset, options["format"], options["chunk_size"]):
+                output.write(line)
+        finally:
+            if options["output"]:
+                output.close()
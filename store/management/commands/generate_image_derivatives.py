@@ -0,0 +1,49 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from store import catalog, images, versions
+from store.models import GalleryItem, Product
+
+
+def _generate(name):
+    return images.generate_derivatives(name)
+
+
+class Command(BaseCommand):
+    help = "Generate responsive WebP/JPEG variants for product and gallery images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate variants that are already up to date.")
+        parser.add_argument("--workers", type=int, default=2, help="Number of worker processes.")
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model in (Product, GalleryItem):
+            for obj in model.objects.exclude(image="").exclude(image__isnull=True).only("pk", "image", "image_variants"):
+                if options["force"] or images.needs_derivatives(obj):
+                    jobs.append((model, obj))
+        if not jobs:
+            self.stdout.write("All images are up to date")
+            return
+
+        # Workers only touch files; the database is written from this process.
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            futures = [(model, obj, pool.submit(_generate, obj.image.name)) for model, obj in jobs]
+            for model, obj, future in futures:
+                try:
+                    widths, original_width = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {obj.pk} ({obj.image.name}): {e}")
+                    continue
+                variants = {"source": obj.image.name, "widths": widths, "width": original_width}
+                model.objects.filter(pk=obj.pk).update(image_variants=variants)
+                done += 1
+
+        catalog.bump_version()
+        versions.bump_version("gallery")
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} images ({failed} failed)"))
@@ -0,0 +1,49 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store import static_assets
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+
+class Command(BaseCommand):
+    help = "Recompress images and write .gz siblings in STATIC_ROOT. Run after collectstatic."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--jpeg-quality",
+            type=int,
+            default=None,
+            help="Re-encode JPEGs at this quality instead of keeping the original quantization (lossy).",
+        )
+        parser.add_argument("--no-images", action="store_true", help="Only write .gz siblings.")
+
+    def handle(self, *args, **options):
+        root = str(settings.STATIC_ROOT)
+        if not os.path.exists(static_assets.manifest_path()):
+            raise CommandError(f"No static manifest in {root}; run collectstatic first.")
+
+        gzip_extensions = {ext.lower() for ext in settings.STATIC_GZIP_EXTENSIONS}
+        images = saved = gzipped = 0
+        for dirpath, _dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                ext = os.path.splitext(filename)[1].lower()
+                if ext in IMAGE_EXTENSIONS and not options["no_images"]:
+                    try:
+                        bytes_saved = static_assets.optimize_image(path, options["jpeg_quality"])
+                    except Exception as e:
+                        self.stderr.write(f"{os.path.relpath(path, root)}: {e}")
+                        continue
+                    if bytes_saved:
+                        images += 1
+                        saved += bytes_saved
+                elif ext in gzip_extensions:
+                    if static_assets.gzip_file(path) is not None:
+                        gzipped += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recompressed {images} images ({saved / 1024 / 1024:.1f} MB saved), wrote {gzipped} .gz files")
+        )
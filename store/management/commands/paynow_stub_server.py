@@ -0,0 +1,71 @@
+import hashlib
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store.paynow_gateway import paynow_hash
+
+
+def stub_status(reference, paid_percent, failed_percent):
+    # Stable per reference, so repeated runs see the same outcome.
+    bucket = int(hashlib.sha1(reference.encode("utf-8")).hexdigest(), 16) % 100
+    if bucket < paid_percent:
+        return "Paid"
+    if bucket < paid_percent + failed_percent:
+        return "Cancelled"
+    return "Sent"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for Paynow's poll URLs, for trying reconcile_payments. "
+        "Point orders' paynow_poll_url at http://HOST:PORT/poll/<reference>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds to wait before each reply.")
+        parser.add_argument("--paid", type=int, default=60, help="Percent of references reported Paid.")
+        parser.add_argument("--failed", type=int, default=20, help="Percent of references reported Cancelled.")
+
+    def handle(self, *args, **options):
+        key = settings.PAYNOW_INTEGRATION_KEY
+        command = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                reference = self.path.rstrip("/").rsplit("/", 1)[-1]
+                time.sleep(options["latency"])
+                values = {
+                    "reference": reference,
+                    "paynowreference": f"STUB-{reference}",
+                    "amount": "10.00",
+                    "status": stub_status(reference, options["paid"], options["failed"]),
+                    "pollurl": f"http://{options['host']}:{options['port']}{self.path}",
+                }
+                values["hash"] = paynow_hash(values, key)
+                body = urlencode(values).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-www-form-urlencoded")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                if command.verbosity > 1:
+                    command.stderr.write(format % args)
+
+        self.verbosity = options["verbosity"]
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        self.stdout.write(f"Stub Paynow listening on http://{options['host']}:{options['port']}/poll/<reference>")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
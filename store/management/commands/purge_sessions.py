@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions a small batch at a time, pausing between batches so the SQLite write lock is "
+        "never held for long. An incremental alternative to clearsessions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--sleep", type=float, default=0.05, help="Seconds to pause between batches.")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches; the next run carries on.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by("expire_date")
+        deleted = batches = 0
+        started = time.monotonic()
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            # Keys are read outside the write transaction; the DELETE by
+            # primary key is the only part that holds the lock.
+            keys = list(expired.values_list("session_key", flat=True)[: options["batch_size"]])
+            if not keys:
+                break
+            with transaction.atomic():
+                count, _ = Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()
+            deleted += count
+            batches += 1
+            if len(keys) < options["batch_size"]:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired sessions in {batches} batches ({time.monotonic() - started:.1f}s)")
+        )
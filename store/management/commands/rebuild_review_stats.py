@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from store import feedback, versions
+
+
+class Command(BaseCommand):
+    help = "Recount the ReviewStats row from the Review table."
+
+    def handle(self, *args, **options):
+        stats = feedback.rebuild_stats()
+        versions.bump_version("reviews")
+        self.stdout.write(self.style.SUCCESS(f"{stats.visible_count} visible reviews, average {stats.average_rating}"))
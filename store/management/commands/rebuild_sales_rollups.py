@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales and product rollups from Order and OrderItem."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Only rebuild this day (YYYY-MM-DD, local time).")
+
+    def handle(self, *args, **options):
+        day = None
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+        summaries, products = rollups.rebuild(day)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {summaries} daily summary rows and {products} product rows"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 product search index from the Product table."
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError("The FTS5 search index is not available; product search uses the LIKE fallback.")
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products"))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store import paynow, reconcile
+from store.paynow_gateway import get_latency_stats
+
+
+class Command(BaseCommand):
+    help = "Poll Paynow for pending orders and apply the payments that were completed or cancelled."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-age", type=int, default=10, help="Only orders pending for at least this many minutes.")
+        parser.add_argument("--max-age", type=int, help="Skip orders older than this many hours.")
+        parser.add_argument("--limit", type=int, help="Poll at most this many orders, oldest first.")
+        parser.add_argument("--concurrency", type=int, default=settings.PAYNOW_HTTP_POOL_SIZE, help="Polls in flight at once.")
+        parser.add_argument("--rps", type=float, default=10.0, help="Maximum polls per second (0 for no limit).")
+        parser.add_argument("--batch-size", type=int, default=100, help="Orders per status UPDATE.")
+
+    def handle(self, *args, **options):
+        if not paynow.is_configured():
+            raise CommandError("Paynow is not configured.")
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options["concurrency"] > settings.PAYNOW_HTTP_POOL_SIZE:
+            self.stderr.write(
+                f"--concurrency {options['concurrency']} is above PAYNOW_HTTP_POOL_SIZE "
+                f"({settings.PAYNOW_HTTP_POOL_SIZE}); extra connections will not be reused."
+            )
+        max_age = timedelta(hours=options["max_age"]) if options["max_age"] else None
+        queryset = reconcile.pending_orders(timedelta(minutes=options["min_age"]), max_age, options["limit"])
+        stats = reconcile.reconcile(queryset, options["concurrency"], options["rps"], options["batch_size"])
+
+        seconds = stats["seconds"]
+        rate = stats["polled"] / seconds if seconds else 0.0
+        self.stdout.write(
+            f"Polled {stats['polled']} orders in {seconds:.1f}s ({rate:.1f}/s): "
+            f"{stats['paid']} paid, {stats['failed']} failed, {stats['pending']} still pending, {stats['errors']} errors"
+        )
+        check = get_latency_stats().get("check_status")
+        if check and check["count"]:
+            self.stdout.write(f"Mean poll latency {check['sum_ms'] / check['count']:.0f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Updated {stats['updated']} orders"))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import notifications
+
+
+class Command(BaseCommand):
+    help = "Deliver queued order notifications (email and WhatsApp) with retry and backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting when it is empty.")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait between polls when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = notifications.deliver_batch(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Delivered {sent}, failed {failed}")
+            if sent + failed >= batch_size:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} delivered, {total_failed} failed"))
@@ -0,0 +1,133 @@
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags
+
+from . import versions
+from .utils import get_cart_count
+
+# url name -> content versions the page is rendered from
+CACHEABLE_VIEWS = {
+    "home": ("catalog", "reviews"),
+    "product_list": ("catalog",),
+    "product_detail": ("catalog",),
+    "about": (),
+    "gallery": ("gallery",),
+    "reviews": ("reviews",),
+    "reviews_more": ("reviews",),
+}
+
+_release = None
+
+
+def _release_token():
+    # Changes on deploy so old ETags stop matching new templates.
+    global _release
+    if _release is None:
+        _release = settings.PAGE_CACHE_RELEASE
+        if not _release:
+            templates = Path(settings.BASE_DIR) / "templates"
+            _release = str(max((p.stat().st_mtime_ns for p in templates.rglob("*.html")), default=0))
+    return _release
+
+
+class AnonymousPageCacheMiddleware:
+    # Strong ETag/Last-Modified for anonymous GETs of catalog-style pages,
+    # derived from content versions so a 304 needs no view or template work.
+    # With PAGE_CACHE_STORE the rendered HTML is also kept in the shared
+    # cache. Pages that render a CSRF token are stored per CSRF cookie.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        state = getattr(request, "_page_cache", None)
+        if state is None or response.status_code != 200 or response.streaming:
+            return response
+        self._decorate(response, state)
+        if settings.PAGE_CACHE_STORE:
+            self._store(request, response, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        match = request.resolver_match
+        names = CACHEABLE_VIEWS.get(match.url_name if match else None)
+        if names is None or request.user.is_authenticated:
+            return None
+
+        content_versions = versions.get_versions(names) if names else {}
+        base = "|".join([
+            _release_token(),
+            # Scheme and host too: the page renders absolute canonical and
+            # og:url links from them.
+            request.build_absolute_uri(),
+            str(get_cart_count(request)),
+            ",".join(f"{n}={v}" for n, v in sorted(content_versions.items())),
+        ])
+        csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+        state = {
+            "base_key": "page:" + hashlib.sha256(base.encode("utf-8")).hexdigest(),
+            "etag": '"' + hashlib.sha256(f"{base}|{csrf_cookie}".encode("utf-8")).hexdigest()[:32] + '"',
+            "last_modified": max(content_versions.values(), default=0) / 1e9 or None,
+            "csrf_cookie": csrf_cookie,
+        }
+        request._page_cache = state
+
+        if state["etag"] in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+            self._decorate(response, state)
+            return response
+
+        if settings.PAGE_CACHE_STORE:
+            entry = cache.get(state["base_key"])
+            if entry and entry.get("per_csrf_cookie"):
+                entry = cache.get(self._csrf_key(state, csrf_cookie)) if csrf_cookie else None
+            if entry and "content" in entry:
+                request._page_cache = None
+                response = HttpResponse(entry["content"], content_type=entry["content_type"])
+                self._decorate(response, state)
+                response["X-Page-Cache"] = "hit"
+                return response
+        return None
+
+    def _csrf_key(self, state, csrf_cookie):
+        return state["base_key"] + ":" + hashlib.sha256(csrf_cookie.encode("utf-8")).hexdigest()
+
+    def _decorate(self, response, state):
+        response["ETag"] = state["etag"]
+        if state["last_modified"]:
+            response["Last-Modified"] = http_date(state["last_modified"])
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ("Cookie",))
+
+    def _store(self, request, response, state):
+        entry = {"content": response.content, "content_type": response["Content-Type"]}
+        if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            # The body embeds a token tied to this visitor's CSRF cookie.
+            csrf_cookie = request.META.get("CSRF_COOKIE")
+            if not csrf_cookie:
+                return
+            cache.set(state["base_key"], {"per_csrf_cookie": True}, settings.PAGE_CACHE_TIMEOUT)
+            cache.set(self._csrf_key(state, csrf_cookie), entry, settings.PAGE_CACHE_TIMEOUT)
+        else:
+            cache.set(state["base_key"], entry, settings.PAGE_CACHE_TIMEOUT)
+
+
+class CartMiddleware:
+    # Lets the cart store write its cookie (or nothing) once the view is done.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        store = getattr(request, "_cart_store", None)
+        if store is not None:
+            store.process_response(response)
+        return response
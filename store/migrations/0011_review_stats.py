@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:18
+
+from django.db import migrations, models
+
+
+def populate_review_stats(apps, schema_editor):
+    Review = apps.get_model("store", "Review")
+    ReviewStats = apps.get_model("store", "ReviewStats")
+    stats = ReviewStats(pk=1)
+    for is_visible, rating in Review.objects.filter(is_visible=True).values_list("is_visible", "rating").iterator():
+        stats.visible_count += 1
+        if rating:
+            stats.rating_count += 1
+            stats.rating_total += rating
+            setattr(stats, f"stars_{rating}", getattr(stats, f"stars_{rating}") + 1)
+    stats.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visible_count', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Review stats',
+                'verbose_name_plural': 'Review stats',
+            },
+        ),
+        migrations.RunPython(populate_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    Order = apps.get_model("store", "Order")
+    OrderItem = apps.get_model("store", "OrderItem")
+    DailySalesSummary = apps.get_model("store", "DailySalesSummary")
+    DailyProductSales = apps.get_model("store", "DailyProductSales")
+    DailySalesSummary.objects.bulk_create(
+        [
+            DailySalesSummary(
+                date=row["day"],
+                status=row["status"],
+                delivery_method=row["delivery_method"],
+                order_count=row["order_count"],
+                revenue=row["revenue"] or Decimal("0.00"),
+            )
+            for row in Order.objects.order_by()
+            .annotate(day=TruncDate("created_at"))
+            .values("day", "status", "delivery_method")
+            .annotate(order_count=Count("id"), revenue=Sum("total"))
+        ],
+        batch_size=1000,
+    )
+    DailyProductSales.objects.bulk_create(
+        [
+            DailyProductSales(
+                date=row["day"],
+                product_id=row["product_id"],
+                quantity=row["quantity"],
+                revenue=row["revenue"] or Decimal("0.00"),
+            )
+            for row in OrderItem.objects.filter(order__status="PAID")
+            .order_by()
+            .annotate(day=TruncDate("order__created_at"))
+            .values("day", "product_id")
+            .annotate(quantity=Sum("qty"), revenue=Sum("line_total"))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('CREATED', 'Created'), ('PENDING', 'Pending'), ('PAID', 'Paid'), ('FAILED', 'Failed')], max_length=20)),
+                ('delivery_method', models.CharField(blank=True, max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Daily sales summary',
+                'verbose_name_plural': 'Daily sales summaries',
+                'ordering': ['-date', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'status', 'delivery_method'), name='store_dailysales_unique_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='store.product')),
+            ],
+            options={
+                'verbose_name': 'Daily product sales',
+                'verbose_name_plural': 'Daily product sales',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='store_dailyproductsales_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from decimal import Decimal
 from django.db import models
+from django.utils import timezone
 
 
 class Category(models.Model):
@@ -21,11 +22,19 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to="products/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Partial rather than (is_active, ...): Django renders
+            # filter(is_active=True) as a bare "WHERE is_active", which
+            # SQLite only matches against an index with the same condition.
+            models.Index(fields=["created_at"], condition=models.Q(is_active=True), name="store_product_active_created"),
+            models.Index(fields=["name"], condition=models.Q(is_active=True), name="store_product_active_name"),
+        ]
 
     def __str__(self):
         return self.name
@@ -71,13 +80,39 @@ class Order(models.Model):
     paynow_poll_url = models.URLField(blank=True)
     paynow_redirect_url = models.URLField(blank=True)
     whatsapp_sent = models.BooleanField(default=False)
+    idempotency_key = models.CharField(max_length=64, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["idempotency_key"],
+                condition=~models.Q(idempotency_key=""),
+                name="store_order_unique_idempotency_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="store_order_status_created"),
+            models.Index(fields=["created_at"], name="store_order_created"),
+        ]
 
     def __str__(self):
         return self.reference
 
+    ROLLUP_FIELDS = ("status", "created_at", "delivery_method", "total")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the sales rollups currently count for this order, so a later
+        # save or delete can apply just the difference.
+        if all(name in field_names for name in cls.ROLLUP_FIELDS):
+            instance._rollup_state = instance.rollup_state()
+        return instance
+
+    def rollup_state(self):
+        return (self.status, timezone.localdate(self.created_at), self.delivery_method, self.total)
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
@@ -92,12 +127,14 @@ class OrderItem(models.Model):
 
 class GalleryItem(models.Model):
     image = models.ImageField(upload_to="gallery/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     video = models.FileField(upload_to="gallery/", blank=True, null=True)
     caption = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["created_at"], name="store_galleryitem_created")]
         verbose_name = "Gallery item"
         verbose_name_plural = "Gallery"
 
@@ -142,6 +179,9 @@ class Review(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], condition=models.Q(is_visible=True), name="store_review_visible_created"),
+        ]
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
 
@@ -149,3 +189,133 @@ class Review(models.Model):
         preview = self.text[:50] + "…" if len(self.text) > 50 else self.text
         return f"{self.name} – {preview}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What ReviewStats currently counts for this row, so a later save or
+        # delete can apply just the difference.
+        if "is_visible" in field_names and "rating" in field_names:
+            instance._stats_state = instance.stats_state()
+        return instance
+
+    def stats_state(self):
+        return (self.is_visible, self.rating)
+
+
+class ReviewStats(models.Model):
+    # Single row (pk=1) of visible-review aggregates, kept current by the
+    # Review save/delete signals.
+    visible_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Review stats"
+        verbose_name_plural = "Review stats"
+
+    def __str__(self):
+        return f"{self.visible_count} reviews"
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_total / self.rating_count, 1)
+
+    @property
+    def histogram(self):
+        rows = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f"stars_{stars}")
+            percent = round(100 * count / self.rating_count) if self.rating_count else 0
+            rows.append({"stars": stars, "count": count, "percent": percent})
+        return rows
+
+
+class Notification(models.Model):
+    KIND_ADMIN_ORDER_PAID_EMAIL = "admin_order_paid_email"
+    KIND_CUSTOMER_ORDER_PAID_EMAIL = "customer_order_paid_email"
+    KIND_ADMIN_ORDER_PAID_WHATSAPP = "admin_order_paid_whatsapp"
+    KIND_CUSTOMER_PAYMENT_FAILED_EMAIL = "customer_payment_failed_email"
+    KIND_ADMIN_NEW_ORDER_WHATSAPP = "admin_new_order_whatsapp"
+
+    KIND_CHOICES = [
+        (KIND_ADMIN_ORDER_PAID_EMAIL, "Admin order paid email"),
+        (KIND_CUSTOMER_ORDER_PAID_EMAIL, "Customer order paid email"),
+        (KIND_ADMIN_ORDER_PAID_WHATSAPP, "Admin order paid WhatsApp"),
+        (KIND_CUSTOMER_PAYMENT_FAILED_EMAIL, "Customer payment failed email"),
+        (KIND_ADMIN_NEW_ORDER_WHATSAPP, "Admin new order WhatsApp"),
+    ]
+
+    STATUS_PENDING = "PENDING"
+    STATUS_SENT = "SENT"
+    STATUS_DEAD = "DEAD"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="notifications", blank=True, null=True)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} – {self.order or '-'}"
+
+
+class DailySalesSummary(models.Model):
+    # Orders per local day, status and delivery method, kept current by
+    # store.rollups as orders are created and change status.
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    delivery_method = models.CharField(max_length=20, blank=True)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["-date", "status"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "status", "delivery_method"], name="store_dailysales_unique_bucket"),
+        ]
+        verbose_name = "Daily sales summary"
+        verbose_name_plural = "Daily sales summaries"
+
+    def __str__(self):
+        return f"{self.date} {self.status} {self.delivery_method or '-'}"
+
+
+class DailyProductSales(models.Model):
+    # Quantity and revenue of paid order lines per product per local day.
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "product"], name="store_dailyproductsales_unique_bucket"),
+        ]
+        verbose_name = "Daily product sales"
+        verbose_name_plural = "Daily product sales"
+
+    def __str__(self):
+        return f"{self.date} {self.product_id} x {self.quantity}"
@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from . import renderers, whatsapp
+from .models import Notification, Order
+from .snapshots import get_order_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def send_admin_order_paid_email(order):
+    subject, body = renderers.admin_order_paid_email(get_order_snapshot(order))
+    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [settings.ADMIN_EMAIL])
+
+
+def send_admin_order_paid_whatsapp(order):
+    if order.status != Order.STATUS_PAID:
+        return
+    if order.whatsapp_sent:
+        return
+    if not whatsapp.is_configured():
+        return
+    whatsapp.send_text(settings.WA_ADMIN_TO, renderers.admin_order_paid_whatsapp(get_order_snapshot(order)))
+    order.whatsapp_sent = True
+    order.save(update_fields=["whatsapp_sent"])
+
+
+def send_admin_new_order_whatsapp(order, text=""):
+    if not whatsapp.is_configured():
+        return
+    whatsapp.send_text(settings.WA_ADMIN_TO, text or renderers.admin_new_order_whatsapp(get_order_snapshot(order)))
+
+
+def send_customer_order_paid_email(order):
+    if not order.email or not order.email.strip():
+        return
+    subject, body = renderers.customer_order_paid_email(get_order_snapshot(order))
+    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [order.email.strip()])
+
+
+def send_customer_payment_failed_email(order):
+    if not order.email or not order.email.strip():
+        return
+    subject, body = renderers.customer_payment_failed_email(get_order_snapshot(order))
+    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [order.email.strip()])
+
+
+SENDERS = {
+    Notification.KIND_ADMIN_ORDER_PAID_EMAIL: send_admin_order_paid_email,
+    Notification.KIND_CUSTOMER_ORDER_PAID_EMAIL: send_customer_order_paid_email,
+    Notification.KIND_ADMIN_ORDER_PAID_WHATSAPP: send_admin_order_paid_whatsapp,
+    Notification.KIND_CUSTOMER_PAYMENT_FAILED_EMAIL: send_customer_payment_failed_email,
+    Notification.KIND_ADMIN_NEW_ORDER_WHATSAPP: send_admin_new_order_whatsapp,
+}
+
+
+def enqueue(order, *kinds, payload=None):
+    Notification.objects.bulk_create([Notification(order=order, kind=kind, payload=payload or {}) for kind in kinds])
+
+
+def queue_order_paid(order):
+    enqueue(
+        order,
+        Notification.KIND_ADMIN_ORDER_PAID_EMAIL,
+        Notification.KIND_CUSTOMER_ORDER_PAID_EMAIL,
+        Notification.KIND_ADMIN_ORDER_PAID_WHATSAPP,
+    )
+
+
+def queue_payment_failed(order):
+    enqueue(order, Notification.KIND_CUSTOMER_PAYMENT_FAILED_EMAIL)
+
+
+def queue_new_order(order, order_items):
+    # Rendered now from the in-memory lines, so the worker needs no item queries.
+    text = renderers.admin_new_order_whatsapp(get_order_snapshot(order, order_items))
+    enqueue(order, Notification.KIND_ADMIN_NEW_ORDER_WHATSAPP, payload={"text": text})
+
+
+def _retry_delay(attempts):
+    return min(settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.NOTIFICATION_RETRY_MAX_SECONDS)
+
+
+def _claim(notification, now):
+    # Push next_attempt_at past the lease so concurrent workers skip the row.
+    lease_until = now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+    claimed = Notification.objects.filter(
+        pk=notification.pk,
+        status=Notification.STATUS_PENDING,
+        next_attempt_at=notification.next_attempt_at,
+    ).update(next_attempt_at=lease_until)
+    return claimed == 1
+
+
+def deliver(notification):
+    now = timezone.now()
+    attempts = notification.attempts + 1
+    try:
+        SENDERS[notification.kind](notification.order, **notification.payload)
+    except Exception as e:
+        logger.warning("Notification %s (%s) failed on attempt %s: %s", notification.pk, notification.kind, attempts, e)
+        fields = {"attempts": attempts, "last_error": str(e)[:2000]}
+        if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            fields["status"] = Notification.STATUS_DEAD
+        else:
+            fields["next_attempt_at"] = now + timedelta(seconds=_retry_delay(attempts))
+        Notification.objects.filter(pk=notification.pk).update(**fields)
+        return False
+    Notification.objects.filter(pk=notification.pk).update(
+        status=Notification.STATUS_SENT,
+        attempts=attempts,
+        sent_at=now,
+        last_error="",
+    )
+    return True
+
+
+def deliver_batch(batch_size=50):
+    now = timezone.now()
+    due = list(
+        Notification.objects.filter(status=Notification.STATUS_PENDING, next_attempt_at__lte=now)
+        .select_related("order")
+        .order_by("next_attempt_at")[:batch_size]
+    )
+    # Share one Order instance per order so its snapshot is built once for
+    # all of that order's notifications in the batch.
+    orders = {}
+    for notification in due:
+        if notification.order_id is not None:
+            notification.order = orders.setdefault(notification.order_id, notification.order)
+    sent = failed = 0
+    for notification in due:
+        if not _claim(notification, now):
+            continue
+        if deliver(notification):
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
@@ -0,0 +1,119 @@
+import uuid
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from . import notifications, rollups
+from .models import Order, OrderItem
+
+
+def find_by_idempotency_key(key):
+    if not key:
+        return None
+    return Order.objects.filter(idempotency_key=key).first()
+
+
+def place_order(items, subtotal, data, delivery_fee_value, idempotency_key=""):
+    # Returns (order, created). A repeated idempotency key returns the order
+    # that the first submission created instead of placing a second one.
+    existing = find_by_idempotency_key(idempotency_key)
+    if existing:
+        return existing, False
+
+    delivery_method = data.get("delivery_method")
+    if delivery_method == "delivery":
+        delivery_fee = delivery_fee_value
+    else:
+        delivery_fee = Decimal("0.00")
+
+    order = Order(
+        reference=uuid.uuid4().hex.upper(),
+        full_name=data.get("full_name") or "",
+        phone=data.get("phone") or "",
+        email=data.get("email") or "",
+        theme=data.get("theme") or "",
+        child_name=data.get("child_name") or "",
+        age=data.get("age"),
+        collection_date=data.get("collection_date"),
+        toy_preference=data.get("toy_preference") or "",
+        delivery_method=delivery_method or "",
+        delivery_address=data.get("delivery_address") or "",
+        subtotal=subtotal,
+        delivery_fee=delivery_fee,
+        total=subtotal + delivery_fee,
+        idempotency_key=idempotency_key or "",
+    )
+    lines = []
+    for item in items:
+        product = item["product"]
+        qty = item["qty"]
+        lines.append(
+            OrderItem(
+                order=order,
+                product=product,
+                qty=qty,
+                unit_price=product.price,
+                line_total=product.price * qty,
+            )
+        )
+
+    try:
+        with transaction.atomic():
+            order.save(force_insert=True)
+            OrderItem.objects.bulk_create(lines)
+            notifications.queue_new_order(order, lines)
+    except IntegrityError:
+        existing = find_by_idempotency_key(idempotency_key)
+        if existing:
+            return existing, False
+        raise
+    return order, True
+
+
+# Statuses an order may move to a payment outcome from. PAID is final.
+PAYMENT_TRANSITIONS = {
+    Order.STATUS_PAID: [Order.STATUS_CREATED, Order.STATUS_PENDING, Order.STATUS_FAILED],
+    Order.STATUS_FAILED: [Order.STATUS_CREATED, Order.STATUS_PENDING],
+}
+TRANSITION_FIELDS = ["id", "reference", "status", "created_at", "delivery_method", "total"]
+
+
+def _record_transition(order, status):
+    before = order.rollup_state()
+    order.status = status
+    order._rollup_state = order.rollup_state()
+    rollups.apply_order_change(order, before, order._rollup_state)
+    if status == Order.STATUS_PAID:
+        notifications.queue_order_paid(order)
+    else:
+        notifications.queue_payment_failed(order)
+
+
+def transition(order, status):
+    # Compare-and-set: UPDATE ... WHERE status = <the status we read>, which
+    # must be one the target allows moving from. Only the caller whose UPDATE
+    # matches records the rollup change and queues notifications. If another
+    # request got there first, re-read the status and try again while the
+    # move is still allowed. Returns True if this call moved the order;
+    # either way order.status ends up current.
+    while order.status in PAYMENT_TRANSITIONS[status]:
+        with transaction.atomic():
+            if Order.objects.filter(pk=order.pk, status=order.status).update(status=status):
+                _record_transition(order, status)
+                return True
+        order.status = Order.objects.values_list("status", flat=True).get(pk=order.pk)
+    return False
+
+
+@transaction.atomic
+def transition_many(pks, status):
+    # The batch form of transition(): only rows still in an allowed status
+    # move, and only those are recorded. Returns the orders that moved.
+    allowed = PAYMENT_TRANSITIONS[status]
+    moved = list(Order.objects.select_for_update().filter(pk__in=pks, status__in=allowed).only(*TRANSITION_FIELDS))
+    if not moved:
+        return []
+    Order.objects.filter(pk__in=[order.pk for order in moved], status__in=allowed).update(status=status)
+    for order in moved:
+        _record_transition(order, status)
+    return moved
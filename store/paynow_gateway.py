@@ -0,0 +1,242 @@
+import bisect
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qs, quote_plus
+
+from django.conf import settings
+
+from .http import build_session
+
+INITIATED = "initiated"
+PENDING = "pending"
+PAID = "paid"
+FAILED = "failed"
+
+FAKE_INTEGRATION_KEY = "fake-integration-key"
+
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+class PaynowError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class PaymentResult:
+    status: str
+    poll_url: str = ""
+    redirect_url: str = ""
+    paynow_reference: str = ""
+    error: str = ""
+
+    @property
+    def ok(self):
+        return self.status != FAILED
+
+
+class LatencyHistogram:
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def observe(self, operation, seconds):
+        ms = seconds * 1000
+        index = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            op = self._ops.setdefault(operation, {"count": 0, "sum_ms": 0.0, "buckets": [0] * (len(self.buckets_ms) + 1)})
+            op["count"] += 1
+            op["sum_ms"] += ms
+            op["buckets"][index] += 1
+
+    def snapshot(self):
+        labels = [f"<={b}ms" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        with self._lock:
+            return {
+                name: {"count": op["count"], "sum_ms": op["sum_ms"], "buckets": dict(zip(labels, op["buckets"]))}
+                for name, op in self._ops.items()
+            }
+
+
+def paynow_hash(values, integration_key):
+    # Same scheme as the paynow package: concatenate every value except the
+    # hash itself, append the lowercased key, SHA512, uppercase hex.
+    out = "".join(str(v) for k, v in values.items() if str(k).lower() != "hash")
+    out += integration_key.lower()
+    return hashlib.sha512(out.encode("utf-8")).hexdigest().upper()
+
+
+def status_from_paynow(value):
+    value = (value or "").lower()
+    if value == "paid":
+        return PAID
+    if value in ("cancelled", "failed"):
+        return FAILED
+    return PENDING
+
+
+class PaynowGateway:
+    URL_INITIATE_TRANSACTION = "https://www.paynow.co.zw/interface/initiatetransaction"
+    URL_INITIATE_MOBILE_TRANSACTION = "https://www.paynow.co.zw/interface/remotetransaction"
+
+    def __init__(self, integration_id, integration_key, return_url, result_url, session=None, timeout=30, histogram=None):
+        self.integration_id = integration_id
+        self.integration_key = integration_key
+        self.return_url = return_url
+        self.result_url = result_url
+        self.session = session or build_session()
+        self.timeout = timeout
+        self.histogram = histogram or LatencyHistogram()
+
+    def _post(self, operation, url, data):
+        started = time.monotonic()
+        try:
+            r = self.session.post(url, data=data, timeout=self.timeout)
+            r.raise_for_status()
+        except Exception as e:
+            raise PaynowError(str(e)) from e
+        finally:
+            self.histogram.observe(operation, time.monotonic() - started)
+        return {key: value[0] for key, value in parse_qs(r.text).items()}
+
+    def _build(self, reference, email, amount, extra=None, quote_email=True):
+        body = {
+            "resulturl": self.result_url,
+            "returnurl": self.return_url,
+            "reference": reference,
+            "amount": amount,
+            "id": self.integration_id,
+            "additionalinfo": "Order, ",
+            "authemail": email,
+        }
+        body.update(extra or {})
+        body["status"] = "Message"
+        for key, value in body.items():
+            if key in ("returnurl", "resulturl") or (key == "authemail" and not quote_email):
+                continue
+            body[key] = quote_plus(str(value))
+        body["hash"] = paynow_hash(body, self.integration_key)
+        return body
+
+    def _init_result(self, data):
+        if (data.get("status") or "").lower() == "error":
+            return PaymentResult(FAILED, error=data.get("error") or data.get("status") or "")
+        if data.get("hash") != paynow_hash(data, self.integration_key):
+            raise PaynowError("Hashes do not match")
+        return PaymentResult(
+            INITIATED,
+            poll_url=data.get("pollurl", ""),
+            redirect_url=data.get("browserurl", ""),
+            paynow_reference=data.get("paynowreference", ""),
+        )
+
+    def initiate(self, reference, email, amount):
+        data = self._post("initiate", self.URL_INITIATE_TRANSACTION, self._build(reference, email, amount))
+        return self._init_result(data)
+
+    def initiate_mobile(self, reference, email, amount, phone, method="ecocash"):
+        body = self._build(reference, email, amount, extra={"phone": phone, "method": method}, quote_email=False)
+        data = self._post("initiate_mobile", self.URL_INITIATE_MOBILE_TRANSACTION, body)
+        return self._init_result(data)
+
+    def check_status(self, poll_url):
+        data = self._post("check_status", poll_url, {})
+        return PaymentResult(
+            status_from_paynow(data.get("status")),
+            poll_url=poll_url,
+            paynow_reference=data.get("paynowreference", ""),
+        )
+
+
+class FakePaynowGateway:
+    # Local stand-in for Paynow. PAYNOW_FAKE_OUTCOME picks what polling
+    # returns (paid, failed or pending), PAYNOW_FAKE_LATENCY adds a delay in
+    # seconds and PAYNOW_FAKE_ERROR makes every call raise PaynowError.
+    # Result posts are signed with integration_key (FAKE_INTEGRATION_KEY
+    # unless PAYNOW_INTEGRATION_KEY is set), as Paynow signs with the real one.
+    def __init__(self, outcome=PAID, latency=0.0, error="", histogram=None, integration_key=FAKE_INTEGRATION_KEY):
+        self.integration_key = integration_key
+        self.outcome = outcome
+        self.latency = latency
+        self.error = error
+        self.histogram = histogram or LatencyHistogram()
+
+    def _call(self, operation):
+        started = time.monotonic()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if self.error:
+                raise PaynowError(self.error)
+        finally:
+            self.histogram.observe(operation, time.monotonic() - started)
+
+    def initiate(self, reference, email, amount):
+        self._call("initiate")
+        return PaymentResult(
+            INITIATED,
+            poll_url=f"https://fake.paynow.local/poll/{reference}",
+            redirect_url=f"https://fake.paynow.local/pay/{reference}",
+            paynow_reference=f"FAKE-{reference}",
+        )
+
+    def initiate_mobile(self, reference, email, amount, phone, method="ecocash"):
+        self._call("initiate_mobile")
+        return PaymentResult(INITIATED, poll_url=f"https://fake.paynow.local/poll/{reference}", paynow_reference=f"FAKE-{reference}")
+
+    def check_status(self, poll_url):
+        self._call("check_status")
+        return PaymentResult(self.outcome, poll_url=poll_url)
+
+    def result_post(self, reference, amount, status="Paid"):
+        # The body Paynow would post to the result URL for this reference.
+        body = {
+            "reference": reference,
+            "paynowreference": f"FAKE-{reference}",
+            "amount": str(amount),
+            "status": status,
+            "pollurl": f"https://fake.paynow.local/poll/{reference}",
+        }
+        body["hash"] = paynow_hash(body, self.integration_key)
+        return body
+
+
+def build_gateway():
+    if settings.PAYNOW_BACKEND == "fake":
+        return FakePaynowGateway(
+            outcome=settings.PAYNOW_FAKE_OUTCOME,
+            latency=settings.PAYNOW_FAKE_LATENCY,
+            error=settings.PAYNOW_FAKE_ERROR,
+            integration_key=settings.PAYNOW_INTEGRATION_KEY or FAKE_INTEGRATION_KEY,
+        )
+    return PaynowGateway(
+        settings.PAYNOW_INTEGRATION_ID,
+        settings.PAYNOW_INTEGRATION_KEY,
+        settings.PAYNOW_RETURN_URL or "https://partyfantasy.co.zw/payment/return/",
+        settings.PAYNOW_RESULT_URL or "https://partyfantasy.co.zw/paynow/result/",
+        session=build_session(settings.PAYNOW_HTTP_POOL_SIZE),
+        timeout=settings.PAYNOW_HTTP_TIMEOUT,
+    )
+
+
+def get_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = build_gateway()
+        return _gateway
+
+
+def reset_gateway():
+    global _gateway
+    with _gateway_lock:
+        _gateway = None
+
+
+def get_latency_stats():
+    return get_gateway().histogram.snapshot()
@@ -0,0 +1,86 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import paynow
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "paynow:status:"
+STATS_LOG_EVERY = 100
+
+_lock = threading.Lock()
+_in_flight = {}
+_counters = {"hits": 0, "misses": 0, "coalesced": 0}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.status = None
+
+
+def _cache_key(reference):
+    return CACHE_KEY_PREFIX + reference
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+        total = sum(_counters.values())
+        snapshot = dict(_counters) if total % STATS_LOG_EVERY == 0 else None
+    if snapshot:
+        logger.info("Paynow status lookups: %s", snapshot)
+
+
+def get_stats():
+    with _lock:
+        return dict(_counters)
+
+
+def reset_stats():
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
+
+
+def invalidate(reference):
+    cache.delete(_cache_key(reference))
+
+
+def lookup(order):
+    # Returns the status to show for the order. A cached or coalesced answer
+    # can be up to a TTL old, so it is only returned and never set on order:
+    # a caller saving the instance must not write a stale status back.
+    if order.status == Order.STATUS_PAID:
+        return order.status
+    key = _cache_key(order.reference)
+    cached = cache.get(key)
+    if cached is not None:
+        _count("hits")
+        return cached
+
+    with _lock:
+        flight = _in_flight.get(order.reference)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[order.reference] = _Flight()
+
+    if not leader:
+        _count("coalesced")
+        flight.done.wait(settings.PAYNOW_STATUS_WAIT_TIMEOUT)
+        return flight.status if flight.status is not None else order.status
+
+    _count("misses")
+    try:
+        status = paynow.check_payment_status(order)
+        cache.set(key, status, settings.PAYNOW_STATUS_CACHE_TTL)
+        flight.status = status
+    finally:
+        with _lock:
+            _in_flight.pop(order.reference, None)
+        flight.done.set()
+    return status
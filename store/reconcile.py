@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.utils import timezone
+
+from . import orders, paynow_status
+from .models import Order
+from .paynow_gateway import FAILED, PAID, PaynowError, get_gateway
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = {PAID: Order.STATUS_PAID, FAILED: Order.STATUS_FAILED}
+
+
+class RateLimiter:
+    # Spaces calls at least 1/rate seconds apart across all threads.
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def pending_orders(min_age, max_age=None, limit=None):
+    now = timezone.now()
+    queryset = (
+        Order.objects.filter(status=Order.STATUS_PENDING, created_at__lte=now - min_age)
+        .exclude(paynow_poll_url="")
+        .order_by("created_at", "id")
+        .only("id", "reference", "paynow_poll_url")
+    )
+    if max_age is not None:
+        queryset = queryset.filter(created_at__gte=now - max_age)
+    return queryset[:limit] if limit else queryset
+
+
+def _poll(gateway, limiter, order):
+    limiter.wait()
+    try:
+        return order, gateway.check_status(order.paynow_poll_url).status
+    except PaynowError as e:
+        logger.warning("Paynow reconcile poll failed for %s: %s", order.reference, e)
+        return order, None
+
+
+def reconcile(queryset, concurrency=10, rate=10.0, batch_size=100):
+    # Polls are spread over a thread pool and throttled to `rate` requests a
+    # second; all database writes stay on this thread, a batch at a time.
+    gateway = get_gateway()
+    limiter = RateLimiter(rate)
+    stats = {"polled": 0, "paid": 0, "failed": 0, "pending": 0, "errors": 0, "updated": 0, "seconds": 0.0}
+    batches = {status: [] for status in OUTCOMES.values()}
+
+    def flush(status):
+        pks = batches[status]
+        if pks:
+            moved = orders.transition_many(pks, status)
+            stats["updated"] += len(moved)
+            for order in moved:
+                paynow_status.invalidate(order.reference)
+            batches[status] = []
+
+    started = time.monotonic()
+    candidates = list(queryset)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for order, result in executor.map(lambda order: _poll(gateway, limiter, order), candidates):
+            stats["polled"] += 1
+            if result is None:
+                stats["errors"] += 1
+                continue
+            status = OUTCOMES.get(result)
+            if status is None:
+                stats["pending"] += 1
+                continue
+            stats["paid" if status == Order.STATUS_PAID else "failed"] += 1
+            batches[status].append(order.pk)
+            if len(batches[status]) >= batch_size:
+                flush(status)
+    for status in batches:
+        flush(status)
+    stats["seconds"] = time.monotonic() - started
+    return stats
@@ -0,0 +1,107 @@
+def _order_details(snapshot, child_label):
+    return [
+        f"Name: {snapshot.full_name or '-'}",
+        f"Phone: {snapshot.phone or '-'}",
+        f"Email: {snapshot.email or '(not provided)'}",
+        f"Theme: {snapshot.theme or '-'}",
+        f"{child_label}: {snapshot.child_name or '-'}",
+        f"Age: {snapshot.age or '-'}",
+        f"Collection date: {snapshot.collection_date or '-'}",
+        f"Toy preference: {snapshot.toy_preference or '-'}",
+        f"Delivery: {snapshot.delivery_method or '-'}",
+        f"Address: {snapshot.delivery_address or '-'}",
+    ]
+
+
+def _email_item_lines(snapshot):
+    return [f"  • {line.name} x {line.qty} @ $ {line.unit_price} = $ {line.line_total}" for line in snapshot.lines]
+
+
+def _whatsapp_item_lines(snapshot):
+    return [f"- {line.name} x{line.qty} = $ {line.line_total}" for line in snapshot.lines]
+
+
+def _totals(snapshot):
+    return [
+        f"Subtotal: $ {snapshot.subtotal}",
+        f"Delivery: $ {snapshot.delivery_fee}",
+        f"Total: $ {snapshot.total}",
+    ]
+
+
+def _customer_name(snapshot):
+    return (snapshot.full_name or "there").strip() or "there"
+
+
+def admin_order_paid_email(snapshot):
+    lines = [f"Order reference: {snapshot.reference}"]
+    lines.extend(_order_details(snapshot, "Child name"))
+    lines.extend(["", "Items:"])
+    lines.extend(_email_item_lines(snapshot))
+    lines.append("")
+    lines.extend(_totals(snapshot))
+    lines.extend(["", "[PAID]"])
+    return f"Order paid #{snapshot.reference} – Party Fantasy ZW", "\n".join(lines)
+
+
+def customer_order_paid_email(snapshot):
+    lines = [
+        f"Order reference: {snapshot.reference}",
+        "",
+        "Order summary:",
+        f"  Subtotal:    $ {snapshot.subtotal}",
+        f"  Delivery:    $ {snapshot.delivery_fee}",
+        f"  Total:       $ {snapshot.total}",
+        "",
+        "Items:",
+    ]
+    lines.extend(_email_item_lines(snapshot))
+    summary = "\n".join(lines)
+    body = (
+        f"Dear {_customer_name(snapshot)},\n\n"
+        "Thank you for your order. We have received your payment and your order is confirmed.\n\n"
+        f"{summary}\n\n"
+        "We will be in touch regarding delivery or collection. "
+        "If you have any questions, please reply to this email or contact us—we are happy to help.\n\n"
+        "Best regards,\n"
+        "The Party Fantasy ZW Team"
+    )
+    return f"Order confirmed – #{snapshot.reference} – Party Fantasy ZW", body
+
+
+def customer_payment_failed_email(snapshot):
+    body = (
+        f"Dear {_customer_name(snapshot)},\n\n"
+        "We are sorry, but the payment for your order could not be completed. "
+        "Your payment may have been cancelled or declined. No charges have been made to your account.\n\n"
+        f"Order reference: {snapshot.reference}\n\n"
+        "If you would like to complete your purchase, you can try again from the payment page or place a new order on our website. "
+        "If you need any assistance, please reply to this email or contact us—we are here to help.\n\n"
+        "Best regards,\n"
+        "The Party Fantasy ZW Team"
+    )
+    return f"Payment not completed – Order #{snapshot.reference} – Party Fantasy ZW", body
+
+
+def admin_order_paid_whatsapp(snapshot):
+    lines = ["NEW PAID ORDER ✅", f"Ref: {snapshot.reference}"]
+    lines.extend(_order_details(snapshot, "Child"))
+    lines.extend(["", "Items:"])
+    lines.extend(_whatsapp_item_lines(snapshot))
+    lines.append("")
+    lines.extend(_totals(snapshot))
+    return "\n".join(lines)
+
+
+def admin_new_order_whatsapp(snapshot):
+    lines = ["NEW ORDER (Payment Later) 🟡", f"Ref: {snapshot.reference}"]
+    lines.extend(_order_details(snapshot, "Child"))
+    lines.extend(["", "Items:"])
+    lines.extend(_whatsapp_item_lines(snapshot))
+    lines.append("")
+    lines.extend(_totals(snapshot))
+    lines.extend([
+        "",
+        "Customer message: Please confirm order on WhatsApp. Payment will be arranged after confirmation.",
+    ])
+    return "\n".join(lines)
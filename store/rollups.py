@@ -0,0 +1,134 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySalesSummary, Order, OrderItem
+
+
+def _upsert_sql(model, keys, columns):
+    # INSERT ... ON CONFLICT DO UPDATE adding the new values to the existing
+    # bucket, so each rollup change is one statement whether or not the row
+    # exists yet (SQLite 3.24+ and PostgreSQL).
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    return (
+        f"ON CONFLICT ({', '.join(quote(key) for key in keys)}) DO UPDATE SET "
+        + ", ".join(f"{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}" for column in columns)
+    )
+
+
+def _add_summary(day, status, delivery_method, order_count, revenue):
+    quote = connection.ops.quote_name
+    table = DailySalesSummary._meta.db_table
+    keys = ["date", "status", "delivery_method"]
+    columns = ["order_count", "revenue"]
+    sql = (
+        f"INSERT INTO {quote(table)} ({', '.join(quote(c) for c in keys + columns)}) VALUES (%s, %s, %s, %s, %s) "
+        + _upsert_sql(DailySalesSummary, keys, columns)
+    )
+    params = [
+        connection.ops.adapt_datefield_value(day),
+        status,
+        delivery_method,
+        order_count,
+        connection.ops.adapt_decimalfield_value(revenue, 14, 2),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _add_product_lines(order, day, sign):
+    # Every product line of the order in one INSERT ... SELECT ... GROUP BY,
+    # so the statement count does not grow with the number of lines.
+    quote = connection.ops.quote_name
+    table = DailyProductSales._meta.db_table
+    sql = (
+        f"INSERT INTO {quote(table)} ({quote('date')}, {quote('product_id')}, {quote('quantity')}, {quote('revenue')}) "
+        f"SELECT %s, {quote('product_id')}, %s * SUM({quote('qty')}), %s * SUM({quote('line_total')}) "
+        f"FROM {quote(OrderItem._meta.db_table)} WHERE {quote('order_id')} = %s GROUP BY {quote('product_id')} "
+        + _upsert_sql(DailyProductSales, ["date", "product_id"], ["quantity", "revenue"])
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [connection.ops.adapt_datefield_value(day), sign, sign, order.pk])
+
+
+def apply_order_change(order, before, after):
+    # before/after are Order.rollup_state() tuples, or None for an order that
+    # did not exist. Moves the order between summary buckets, and adds or
+    # removes its lines from the product rollup when it enters or leaves PAID.
+    # Buckets emptied by a removal are deleted, so the tables hold exactly
+    # the rows rebuild() would write.
+    if before == after:
+        return
+    for state, sign in ((before, -1), (after, 1)):
+        if state:
+            status, day, delivery_method, total = state
+            _add_summary(day, status, delivery_method, sign, sign * (total or Decimal("0.00")))
+    if before:
+        status, day, delivery_method, _total = before
+        DailySalesSummary.objects.filter(date=day, status=status, delivery_method=delivery_method, order_count__lte=0).delete()
+    was_paid = bool(before) and before[0] == Order.STATUS_PAID
+    is_paid = bool(after) and after[0] == Order.STATUS_PAID
+    if was_paid and is_paid and before[1] == after[1]:
+        return
+    if was_paid:
+        _add_product_lines(order, before[1], -1)
+        DailyProductSales.objects.filter(date=before[1], quantity__lte=0).delete()
+    if is_paid:
+        _add_product_lines(order, after[1], 1)
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+@transaction.atomic
+def rebuild(day=None):
+    # One aggregate pass over Order and one over paid OrderItem, for every
+    # day or just one. Returns the number of summary and product rows written.
+    orders = Order.objects.all()
+    items = OrderItem.objects.filter(order__status=Order.STATUS_PAID)
+    summaries = DailySalesSummary.objects.all()
+    products = DailyProductSales.objects.all()
+    if day is not None:
+        start, end = _day_range(day)
+        orders = orders.filter(created_at__gte=start, created_at__lt=end)
+        items = items.filter(order__created_at__gte=start, order__created_at__lt=end)
+        summaries = summaries.filter(date=day)
+        products = products.filter(date=day)
+    summaries.delete()
+    products.delete()
+
+    summary_rows = [
+        DailySalesSummary(
+            date=row["day"],
+            status=row["status"],
+            delivery_method=row["delivery_method"],
+            order_count=row["order_count"],
+            revenue=row["revenue"] or Decimal("0.00"),
+        )
+        for row in orders.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "status", "delivery_method")
+        .annotate(order_count=Count("id"), revenue=Sum("total"))
+    ]
+    product_rows = [
+        DailyProductSales(
+            date=row["day"],
+            product_id=row["product_id"],
+            quantity=row["quantity"],
+            revenue=row["revenue"] or Decimal("0.00"),
+        )
+        for row in items.order_by()
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id")
+        .annotate(quantity=Sum("qty"), revenue=Sum("line_total"))
+    ]
+    DailySalesSummary.objects.bulk_create(summary_rows, batch_size=1000)
+    DailyProductSales.objects.bulk_create(product_rows, batch_size=1000)
+    return len(summary_rows), len(product_rows)
@@ -0,0 +1,99 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Product
+
+FTS_TABLE = "store_product_fts"
+# bm25 column weights: a hit in the name counts for more than one in the description.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_fts_available = None
+
+
+def fts_available():
+    global _fts_available
+    if _fts_available is None:
+        if connection.vendor != "sqlite":
+            _fts_available = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_available = cursor.fetchone() is not None
+    return _fts_available
+
+
+def match_expression(query):
+    # Every word must match, each as a prefix: "spider box" -> "spider"* "box"*
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def index_product(product):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+            [product.pk, product.name, product.description],
+        )
+
+
+def remove_product(product_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index():
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, name, description) SELECT id, name, description FROM store_product")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def _fts_ids(expression, category_slug):
+    sql = [
+        f"SELECT p.id FROM {FTS_TABLE} f",
+        "JOIN store_product p ON p.id = f.rowid",
+    ]
+    params = [expression]
+    if category_slug:
+        sql.append("JOIN store_category c ON c.id = p.category_id")
+    sql.append(f"WHERE {FTS_TABLE} MATCH %s AND p.is_active")
+    if category_slug:
+        sql.append("AND c.slug = %s")
+        params.append(category_slug)
+    sql.append(f"ORDER BY bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}), p.name LIMIT %s")
+    params.append(settings.SEARCH_RESULT_LIMIT)
+    with connection.cursor() as cursor:
+        cursor.execute(" ".join(sql), params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def fallback_search(query, category_slug=""):
+    products = Product.objects.filter(is_active=True).select_related("category")
+    if query:
+        products = products.filter(name__icontains=query) | products.filter(description__icontains=query)
+    if category_slug:
+        products = products.filter(category__slug=category_slug)
+    return list(products.distinct().order_by("name"))
+
+
+def search_products(query, category_slug=""):
+    # Ranked by relevance and capped at SEARCH_RESULT_LIMIT when FTS5 is
+    # available; otherwise the LIKE scan, ordered by name.
+    expression = match_expression(query)
+    if not expression or not fts_available():
+        return fallback_search(query, category_slug)
+    ids = _fts_ids(expression, category_slug)
+    products = Product.objects.select_related("category").in_bulk(ids)
+    return [products[pk] for pk in ids if pk in products]
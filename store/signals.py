@@ -0,0 +1,105 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import catalog, feedback, images, rollups, search, versions
+from .models import Category, GalleryItem, Order, Product, Review, SiteSetting
+from .utils import bump_site_setting_version
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    catalog.bump_version()
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+
+
+@receiver(post_save, sender=SiteSetting)
+@receiver(post_delete, sender=SiteSetting)
+def site_setting_changed(sender, **kwargs):
+    bump_site_setting_version()
+
+
+@receiver(post_save, sender=GalleryItem)
+@receiver(post_delete, sender=GalleryItem)
+def gallery_changed(sender, **kwargs):
+    versions.bump_version("gallery")
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    # Covers admin list_editable toggles too: the changelist loads each row
+    # from the database, so _stats_state holds what was counted before.
+    after = instance.stats_state()
+    if created:
+        feedback.apply_change(None, after)
+    elif hasattr(instance, "_stats_state"):
+        feedback.apply_change(instance._stats_state, after)
+    else:
+        feedback.rebuild_stats()
+    instance._stats_state = after
+    versions.bump_version("reviews")
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    feedback.apply_change(getattr(instance, "_stats_state", instance.stats_state()), None)
+    versions.bump_version("reviews")
+
+
+@receiver(post_save, sender=Product)
+def product_image_derivatives(sender, instance, **kwargs):
+    try:
+        changed = images.update_derivatives(instance)
+    except Exception:
+        logger.exception("Could not generate image variants for product %s", instance.pk)
+        return
+    if changed:
+        catalog.bump_version()
+
+
+@receiver(post_save, sender=GalleryItem)
+def gallery_image_derivatives(sender, instance, **kwargs):
+    try:
+        changed = images.update_derivatives(instance)
+    except Exception:
+        logger.exception("Could not generate image variants for gallery item %s", instance.pk)
+        return
+    if changed:
+        versions.bump_version("gallery")
+
+
+@receiver(pre_save, sender=Order)
+def order_saving(sender, instance, **kwargs):
+    # An instance built by hand or loaded without the rollup fields has no
+    # _rollup_state; read what the rollups count from the row it replaces.
+    if instance.pk is not None and not hasattr(instance, "_rollup_state"):
+        stored = Order.objects.only(*Order.ROLLUP_FIELDS).filter(pk=instance.pk).first()
+        instance._rollup_state = stored._rollup_state if stored else None
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    after = instance.rollup_state()
+    rollups.apply_order_change(instance, None if created else getattr(instance, "_rollup_state", None), after)
+    instance._rollup_state = after
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    # pre_delete: the order's items still exist to take out of the rollup.
+    rollups.apply_order_change(instance, getattr(instance, "_rollup_state", instance.rollup_state()), None)
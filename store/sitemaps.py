@@ -0,0 +1,119 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.urls import reverse
+
+from . import versions
+from .models import GalleryItem, Product, Review
+
+VERSION_NAMES = ("catalog", "gallery", "reviews")
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SLUG_PLACEHOLDER = "__slug__"
+
+
+def _lastmod(value):
+    return value.astimezone(dt_timezone.utc).isoformat(timespec="seconds") if value else None
+
+
+def _url(loc, changefreq, priority, lastmod=None):
+    lines = ["  <url>", f"    <loc>{escape(loc)}</loc>"]
+    if lastmod:
+        lines.append(f"    <lastmod>{lastmod}</lastmod>")
+    lines.append(f"    <changefreq>{changefreq}</changefreq>")
+    lines.append(f"    <priority>{priority}</priority>")
+    lines.append("  </url>")
+    return "\n".join(lines) + "\n"
+
+
+def _active_products():
+    return Product.objects.filter(is_active=True).order_by("-created_at", "-id")
+
+
+def page_count():
+    key = f"sitemap:page_count:{versions.get_version('catalog')}:{settings.SITEMAP_PAGE_SIZE}"
+    count = cache.get(key)
+    if count is None:
+        count = max(1, -(-_active_products().count() // settings.SITEMAP_PAGE_SIZE))
+        cache.set(key, count, settings.CATALOG_CACHE_TIMEOUT)
+    return count
+
+
+def etag(base, section, page=0):
+    content_versions = versions.get_versions(VERSION_NAMES)
+    token = "|".join([base, section, str(page)] + [str(content_versions[n]) for n in VERSION_NAMES])
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+def last_modified():
+    newest = max(versions.get_versions(VERSION_NAMES).values())
+    return datetime.fromtimestamp(newest / 1e9, tz=dt_timezone.utc)
+
+
+def cached_stream(base, section, page, generate):
+    # Streams on a miss and keeps the assembled document until one of the
+    # content versions in the key changes.
+    key = f"sitemap:{etag(base, section, page)}"
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    for chunk in generate():
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, "".join(parts), settings.CATALOG_CACHE_TIMEOUT)
+
+
+def index(base):
+    yield XML_HEADER
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    latest = {
+        "product": _active_products().aggregate(m=Max("created_at"))["m"],
+        "gallery": GalleryItem.objects.aggregate(m=Max("created_at"))["m"],
+        "review": Review.objects.filter(is_visible=True).aggregate(m=Max("created_at"))["m"],
+    }
+    pages_lastmod = _lastmod(max((v for v in latest.values() if v), default=None))
+    yield "  <sitemap>\n"
+    yield f"    <loc>{escape(base + reverse('sitemap_pages_xml'))}</loc>\n"
+    if pages_lastmod:
+        yield f"    <lastmod>{pages_lastmod}</lastmod>\n"
+    yield "  </sitemap>\n"
+    size = settings.SITEMAP_PAGE_SIZE
+    for page in range(1, page_count() + 1):
+        newest = _active_products().values_list("created_at", flat=True)[(page - 1) * size:page * size].first()
+        yield "  <sitemap>\n"
+        yield f"    <loc>{escape(base + reverse('sitemap_products_xml', kwargs={'page': page}))}</loc>\n"
+        if newest:
+            yield f"    <lastmod>{_lastmod(newest)}</lastmod>\n"
+        yield "  </sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def pages(base):
+    latest_product = _active_products().values_list("created_at", flat=True).first()
+    latest_gallery = GalleryItem.objects.values_list("created_at", flat=True).order_by("-created_at").first()
+    latest_review = Review.objects.filter(is_visible=True).values_list("created_at", flat=True).order_by("-created_at").first()
+    yield XML_HEADER
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    yield _url(f"{base}{reverse('home')}", "weekly", "1.0", _lastmod(latest_product))
+    yield _url(f"{base}{reverse('product_list')}", "weekly", "0.9", _lastmod(latest_product))
+    yield _url(f"{base}{reverse('gallery')}", "monthly", "0.6", _lastmod(latest_gallery))
+    yield _url(f"{base}{reverse('reviews')}", "monthly", "0.6", _lastmod(latest_review))
+    yield _url(f"{base}{reverse('about')}", "yearly", "0.5")
+    yield _url(f"{base}{reverse('contact')}", "yearly", "0.5")
+    yield "</urlset>\n"
+
+
+def products(base, page):
+    size = settings.SITEMAP_PAGE_SIZE
+    detail = base + reverse("product_detail", kwargs={"slug": SLUG_PLACEHOLDER})
+    rows = _active_products().values_list("slug", "created_at")[(page - 1) * size:page * size]
+    yield XML_HEADER
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for slug, created_at in rows.iterator(chunk_size=500):
+        yield _url(detail.replace(SLUG_PLACEHOLDER, slug), "weekly", "0.8", _lastmod(created_at))
+    yield "</urlset>\n"
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import prefetch_related_objects
+
+SNAPSHOT_ATTR = "_order_snapshot"
+
+
+@dataclass(frozen=True)
+class SnapshotLine:
+    name: str
+    qty: int
+    unit_price: Decimal
+    line_total: Decimal
+
+
+@dataclass(frozen=True)
+class OrderSnapshot:
+    reference: str
+    status: str
+    full_name: str
+    phone: str
+    email: str
+    theme: str
+    child_name: str
+    age: object
+    collection_date: object
+    toy_preference: str
+    delivery_method: str
+    delivery_address: str
+    subtotal: Decimal
+    delivery_fee: Decimal
+    total: Decimal
+    lines: tuple
+
+    @classmethod
+    def build(cls, order, order_items):
+        return cls(
+            reference=order.reference,
+            status=order.status,
+            full_name=order.full_name,
+            phone=order.phone,
+            email=order.email,
+            theme=order.theme,
+            child_name=order.child_name,
+            age=order.age,
+            collection_date=order.collection_date,
+            toy_preference=order.toy_preference,
+            delivery_method=order.delivery_method,
+            delivery_address=order.delivery_address,
+            subtotal=order.subtotal,
+            delivery_fee=order.delivery_fee,
+            total=order.total,
+            lines=tuple(SnapshotLine(oi.product.name, oi.qty, oi.unit_price, oi.line_total) for oi in order_items),
+        )
+
+
+def get_order_snapshot(order, order_items=None):
+    # Built once per order instance; every channel renders from the same
+    # snapshot, so a transition costs the same queries however many lines
+    # the order has.
+    snapshot = getattr(order, SNAPSHOT_ATTR, None)
+    if snapshot is None:
+        if order_items is None:
+            prefetch_related_objects([order], "items__product")
+            order_items = order.items.all()
+        snapshot = OrderSnapshot.build(order, order_items)
+        setattr(order, SNAPSHOT_ATTR, snapshot)
+    return snapshot
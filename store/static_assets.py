@@ -0,0 +1,101 @@
+import gzip
+import io
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from PIL import Image
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+_immutable = None
+_immutable_lock = threading.Lock()
+
+
+class ManifestStorage(ManifestStaticFilesStorage):
+    # A file missing from the manifest (e.g. added since the last
+    # collectstatic) is linked by its plain name instead of failing the page.
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            return name
+
+
+def _recompressed(image, jpeg_quality):
+    buffer = io.BytesIO()
+    # Keep colour profile and EXIF so the result looks the same as the source.
+    extra = {key: image.info[key] for key in ("icc_profile", "exif") if image.info.get(key)}
+    if image.format == "PNG":
+        image.save(buffer, "PNG", optimize=True, **extra)
+    elif image.format == "JPEG":
+        if jpeg_quality:
+            options = {"quality": jpeg_quality}
+        else:
+            # Reuse the source quantization tables: only the entropy coding changes.
+            options = {"quality": "keep", "subsampling": "keep"}
+        image.save(buffer, "JPEG", optimize=True, progressive=True, **options, **extra)
+    else:
+        return None
+    return buffer.getvalue()
+
+
+def optimize_image(path, jpeg_quality=None):
+    # Rewrites a PNG or JPEG in place when recompressing makes it smaller.
+    # Returns the number of bytes saved.
+    with Image.open(path) as image:
+        if getattr(image, "n_frames", 1) > 1:
+            return 0
+        image.load()
+        data = _recompressed(image, jpeg_quality)
+    before = os.path.getsize(path)
+    if data is None or len(data) >= before:
+        return 0
+    with open(path, "wb") as f:
+        f.write(data)
+    return before - len(data)
+
+
+def gzip_file(path):
+    # Writes a .gz sibling next to path. mtime=0 keeps the output byte-for-byte
+    # stable between builds. Returns the compressed size, or None when
+    # compressing did not help and no sibling was written.
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) >= len(data):
+        if os.path.exists(path + ".gz"):
+            os.remove(path + ".gz")
+        return None
+    with open(path + ".gz", "wb") as f:
+        f.write(compressed)
+    return len(compressed)
+
+
+def manifest_path():
+    return os.path.join(settings.STATIC_ROOT, staticfiles_storage.manifest_name)
+
+
+def immutable_names():
+    # Fingerprinted file names from the collectstatic manifest. Loaded once per
+    # process; a deploy restarts the workers and picks up the new manifest.
+    global _immutable
+    with _immutable_lock:
+        if _immutable is None:
+            hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+            _immutable = {name for original, name in hashed_files.items() if name != original}
+        return _immutable
+
+
+def reset_immutable_names():
+    global _immutable
+    with _immutable_lock:
+        _immutable = None
+
+
+def cache_control(name):
+    return IMMUTABLE_CACHE_CONTROL if name in immutable_names() else REVALIDATE_CACHE_CONTROL
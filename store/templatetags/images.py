@@ -0,0 +1,38 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from ..images import FORMATS, derivative_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(obj, alt="", css="", sizes="100vw", loading="lazy"):
+    image = obj.image
+    variants = getattr(obj, "image_variants", None) or {}
+    widths = variants.get("widths") if variants.get("source") == image.name else None
+    if not widths:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">', image.url, alt, css, loading)
+
+    def srcset(ext):
+        candidates = [f"{default_storage.url(derivative_name(image.name, w, ext))} {w}w" for w in widths]
+        if ext == "jpg" and variants.get("width"):
+            candidates.append(f"{image.url} {variants['width']}w")
+        return ", ".join(candidates)
+
+    sources = format_html_join(
+        "",
+        '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((ext, srcset(ext), sizes) for ext, _fmt, _options in FORMATS if ext != "jpg"),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        sources,
+        image.url,
+        srcset("jpg"),
+        sizes,
+        alt,
+        css,
+        loading,
+    )
@@ -0,0 +1,256 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import requests
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import file_serving, notifications, orders, paynow_gateway, paynow_status, rollups, whatsapp
+from .admin import EstimatedCountPaginator
+from .management.commands.check_query_plans import FULL_SCAN_RE, hot_queries, query_plan
+from .models import Category, DailyProductSales, DailySalesSummary, Order, OrderItem, Product
+
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=TEST_CACHES, ALLOWED_HOSTS=["127.0.0.1", "localhost"], PAGE_CACHE_STORE=True)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_hosts_and_schemes_do_not_share_entries(self):
+        first = self.client.get("/gallery/", HTTP_HOST="127.0.0.1")
+        self.assertContains(first, '<link rel="canonical" href="http://127.0.0.1/gallery/">')
+
+        second = self.client.get("/gallery/", HTTP_HOST="localhost", secure=True)
+        self.assertNotEqual(second.get("X-Page-Cache"), "hit")
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertContains(second, '<link rel="canonical" href="https://localhost/gallery/">')
+
+        repeat = self.client.get("/gallery/", HTTP_HOST="127.0.0.1")
+        self.assertEqual(repeat.get("X-Page-Cache"), "hit")
+        self.assertContains(repeat, '<link rel="canonical" href="http://127.0.0.1/gallery/">')
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    WA_PHONE_NUMBER_ID="123",
+    WA_ACCESS_TOKEN="token",
+    WA_ADMIN_TO="263770000000",
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class PaidTransitionQueryCountTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Boxes", slug="boxes")
+        self.products = [
+            Product.objects.create(category=category, name=f"Box {i}", slug=f"box-{i}", price=Decimal("5.00")) for i in range(20)
+        ]
+
+    def _order(self, reference, lines):
+        order = Order.objects.create(
+            reference=reference,
+            email="customer@example.com",
+            status=Order.STATUS_PENDING,
+            delivery_method="pickup",
+            total=Decimal("50.00") * lines,
+        )
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, product=product, qty=10, unit_price=product.price, line_total=product.price * 10)
+                for product in self.products[:lines]
+            ]
+        )
+        return Order.objects.get(pk=order.pk)
+
+    def test_paying_costs_the_same_queries_for_any_number_of_lines(self):
+        # Transition, rollups and notification delivery are all set-based, so
+        # the count is fixed; a per-line query would show up as a difference.
+        for lines in (1, 20):
+            with self.subTest(lines=lines):
+                order = self._order(f"LINES-{lines}", lines)
+                with patch("store.whatsapp.send_text") as send_text, self.assertNumQueries(18):
+                    self.assertTrue(orders.transition(order, Order.STATUS_PAID))
+                    self.assertEqual(notifications.deliver_batch(), (3, 0))
+                send_text.assert_called_once()
+
+
+class ServeFileRangeTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.data = bytes(range(256)) * 1024
+        with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+            f.write(cls.data)
+        cls.path = f.name
+        cls.addClassCleanup(os.remove, cls.path)
+
+    def _get(self, **headers):
+        request = RequestFactory().get("/media/file.bin", **headers)
+        response = file_serving.serve_file(request, self.path, "public, max-age=60")
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_single_range(self):
+        response, body = self._get(HTTP_RANGE="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.data)}")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(body, self.data[100:200])
+
+    def test_suffix_range(self):
+        response, body = self._get(HTTP_RANGE="bytes=-500")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes {len(self.data) - 500}-{len(self.data) - 1}/{len(self.data)}")
+        self.assertEqual(body, self.data[-500:])
+
+    def test_unsatisfiable_range(self):
+        response, _body = self._get(HTTP_RANGE=f"bytes={len(self.data)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.data)}")
+
+    def test_stale_if_range_sends_whole_file(self):
+        response, body = self._get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale-etag"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+
+        current, _body = self._get()
+        response, body = self._get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=current["ETag"])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.data[:10])
+
+    def test_concurrent_ranges_get_their_own_bytes(self):
+        step = len(self.data) // 32
+
+        def fetch(n):
+            start = n * step + n
+            response, body = self._get(HTTP_RANGE=f"bytes={start}-{start + step - 1}")
+            return response.status_code, body, self.data[start : start + step]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for status, body, expected in executor.map(fetch, range(31)):
+                self.assertEqual(status, 206)
+                self.assertEqual(body, expected)
+
+
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for label, queryset in hot_queries():
+            plan = query_plan(queryset)
+            with self.subTest(label, plan=plan):
+                self.assertFalse([step for step in plan if FULL_SCAN_RE.match(step) or "TEMP B-TREE" in step])
+
+    def test_filtered_order_and_review_queries_search_an_index(self):
+        plans = {label: query_plan(queryset) for label, queryset in hot_queries()}
+        for label, table in (("order admin, by status", "store_order"), ("reviews keyset page", "store_review")):
+            with self.subTest(label, plan=plans[label]):
+                self.assertTrue(any(step.startswith(f"SEARCH {table} USING INDEX") for step in plans[label]))
+
+
+class WhatsAppRetryTests(SimpleTestCase):
+    def _client(self, *outcomes):
+        session = Mock()
+        session.request.side_effect = outcomes
+        return whatsapp.WhatsAppClient("123", "token", session=session, backoff=0), session
+
+    def _response(self, status):
+        response = requests.Response()
+        response.status_code = status
+        response._content = b'{"ok": true}'
+        return response
+
+    def test_connect_failures_and_retry_statuses_are_retried(self):
+        client, session = self._client(
+            requests.ConnectionError(), requests.ConnectTimeout(), self._response(503), self._response(200)
+        )
+        self.assertEqual(client.send_text("263770000000", "hi"), {"ok": True})
+        self.assertEqual(session.request.call_count, 4)
+
+    def test_read_timeout_is_not_retried(self):
+        client, session = self._client(requests.ReadTimeout(), self._response(200))
+        with self.assertRaises(requests.ReadTimeout):
+            client.send_text("263770000000", "hi")
+        self.assertEqual(session.request.call_count, 1)
+
+
+@override_settings(ADMIN_EXACT_COUNT_LIMIT=5)
+class EstimatedCountPaginatorTests(TestCase):
+    def test_pages_past_an_id_gap_clamp_to_the_last_page(self):
+        created = Order.objects.bulk_create([Order(reference=f"GAP-{i}", total=Decimal("1.00")) for i in range(30)])
+        Order.objects.filter(pk__in=[order.pk for order in created[:15]]).delete()
+        paginator = EstimatedCountPaginator(Order.objects.order_by("pk"), 5)
+        self.assertEqual(paginator.count, created[-1].pk)
+
+        page = paginator.page(paginator.num_pages)
+        self.assertEqual(page.number, 3)
+        self.assertEqual([order.reference for order in page], [f"GAP-{i}" for i in range(25, 30)])
+        self.assertEqual(paginator.count, 15)
+
+
+@override_settings(CACHES=TEST_CACHES, PAYNOW_BACKEND="fake", PAYNOW_INTEGRATION_KEY="")
+class FakePaynowResultTests(TestCase):
+    def setUp(self):
+        paynow_gateway.reset_gateway()
+        self.addCleanup(paynow_gateway.reset_gateway)
+        self.order = Order.objects.create(reference="FAKE-1", status=Order.STATUS_PENDING, total=Decimal("25.00"))
+
+    def test_signed_result_post_is_applied(self):
+        body = paynow_gateway.get_gateway().result_post("FAKE-1", "25.00")
+        response = self.client.post("/paynow/result/", body)
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.STATUS_PAID)
+
+    def test_tampered_result_post_is_rejected(self):
+        body = paynow_gateway.get_gateway().result_post("FAKE-1", "25.00")
+        body["amount"] = "0.01"
+        self.assertEqual(self.client.post("/paynow/result/", body).status_code, 400)
+
+
+class RollupTests(TestCase):
+    def _tables(self):
+        return (
+            list(DailySalesSummary.objects.order_by("date", "status", "delivery_method").values_list("date", "status", "delivery_method", "order_count", "revenue")),
+            list(DailyProductSales.objects.order_by("date", "product_id").values_list("date", "product_id", "quantity", "revenue")),
+        )
+
+    def _assert_matches_rebuild(self):
+        incremental = self._tables()
+        rollups.rebuild()
+        self.assertEqual(incremental, self._tables())
+
+    def setUp(self):
+        category = Category.objects.create(name="Boxes", slug="boxes")
+        self.product = Product.objects.create(category=category, name="Box", slug="box", price=Decimal("5.00"))
+        self.order = Order.objects.create(reference="R-1", status=Order.STATUS_PENDING, delivery_method="pickup", total=Decimal("10.00"))
+        OrderItem.objects.create(order=self.order, product=self.product, qty=2, unit_price=Decimal("5.00"), line_total=Decimal("10.00"))
+
+    def test_transition_leaves_no_empty_buckets(self):
+        orders.transition(self.order, Order.STATUS_PAID)
+        self._assert_matches_rebuild()
+
+    def test_saving_an_instance_without_loaded_state_applies_a_delta(self):
+        orders.transition(self.order, Order.STATUS_PAID)
+        with self.assertNumQueries(7):
+            Order(pk=self.order.pk, reference="R-1", status=Order.STATUS_FAILED, created_at=self.order.created_at, delivery_method="delivery", total=Decimal("12.00")).save()
+        self._assert_matches_rebuild()
+
+    def test_delete_leaves_no_empty_buckets(self):
+        orders.transition(self.order, Order.STATUS_PAID)
+        Order.objects.get(pk=self.order.pk).delete()
+        self._assert_matches_rebuild()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PaynowStatusLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_status_is_returned_without_touching_the_order(self):
+        order = Order.objects.create(reference="LOOK-1", status=Order.STATUS_PENDING, total=Decimal("25.00"))
+        cache.set(paynow_status.CACHE_KEY_PREFIX + order.reference, Order.STATUS_FAILED)
+        self.assertEqual(paynow_status.lookup(order), Order.STATUS_FAILED)
+        self.assertEqual(order.status, Order.STATUS_PENDING)
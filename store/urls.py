@@ -15,11 +15,14 @@ urlpatterns = [
     path("about/", views.about, name="about"),
     path("gallery/", views.gallery, name="gallery"),
     path("reviews/", views.reviews, name="reviews"),
+    path("reviews/more/", views.reviews_more, name="reviews_more"),
     path("contact/", views.contact, name="contact"),
     path("paynow/result/", views.paynow_result, name="paynow_result"),
     path("payments/paynow/ecocash/start/", views.ecocash_start, name="ecocash_start"),
     path("payments/paynow/status/<str:order_reference>/", views.paynow_status_json, name="paynow_status_json"),
     path("robots.txt", views.robots_txt, name="robots_txt"),
     path("sitemap.xml", views.sitemap_xml, name="sitemap_xml"),
+    path("sitemap-pages.xml", views.sitemap_pages_xml, name="sitemap_pages_xml"),
+    path("sitemap-products-<int:page>.xml", views.sitemap_products_xml, name="sitemap_products_xml"),
 ]
 
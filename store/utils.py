@@ -1,21 +1,17 @@
 from decimal import Decimal
+from . import carts, catalog, versions
 from .models import Product, SiteSetting
 
 
-CART_SESSION_KEY = "cart"
+_site_setting = None
 
 
 def get_cart(request):
-    cart = request.session.get(CART_SESSION_KEY)
-    if cart is None:
-        cart = {}
-        request.session[CART_SESSION_KEY] = cart
-    return cart
+    return carts.get_store(request).load()
 
 
 def save_cart(request, cart):
-    request.session[CART_SESSION_KEY] = cart
-    request.session.modified = True
+    carts.get_store(request).save(cart)
 
 
 def add_to_cart_session(request, product_id, qty):
@@ -45,9 +41,10 @@ def update_cart_item(request, product_id, qty):
         if qty < 10:
             qty = 10
         cart[key] = qty
+    elif key in cart:
+        del cart[key]
     else:
-        if key in cart:
-            del cart[key]
+        return
 
     save_cart(request, cart)
 
@@ -61,13 +58,10 @@ def remove_cart_item(request, product_id):
 
 
 def clear_cart(request):
-    if CART_SESSION_KEY in request.session:
-        del request.session[CART_SESSION_KEY]
-        request.session.modified = True
+    carts.get_store(request).clear()
 
 
-def get_cart_items(request):
-    cart = get_cart(request)
+def _load_cart_items(cart):
     product_ids = [int(pk) for pk in cart.keys() if str(pk).isdigit()]
     products = Product.objects.filter(id__in=product_ids, is_active=True)
     items = []
@@ -88,7 +82,74 @@ def get_cart_items(request):
     return items, subtotal
 
 
+def get_cart_items(request):
+    return _load_cart_items(get_cart(request))
+
+
+def get_cart_count(request):
+    return carts.get_store(request).count()
+
+
+class CartSummary:
+    def __init__(self, data):
+        self.count = data["count"]
+        self.subtotal = Decimal(data["subtotal"])
+        self.items = [
+            {
+                "product": {"id": line["product_id"], "name": line["name"], "price": Decimal(line["price"])},
+                "qty": line["qty"],
+                "line_total": Decimal(line["line_total"]),
+            }
+            for line in data["lines"]
+        ]
+
+
+def get_cart_summary(request):
+    # Kept in the cart store with the catalog version it was priced at; it
+    # is rebuilt only after the cart changes (save_cart drops it) or a
+    # catalog edit bumps the version.
+    store = carts.get_store(request)
+    version = catalog.get_version()
+    data = store.get_summary()
+    if data is None or data.get("version") != version:
+        cart = get_cart(request)
+        items, subtotal = _load_cart_items(cart)
+        data = {
+            "version": version,
+            "count": sum(cart.values()),
+            "subtotal": str(subtotal),
+            "lines": [
+                {
+                    "product_id": item["product"].id,
+                    "name": item["product"].name,
+                    "price": str(item["product"].price),
+                    "qty": item["qty"],
+                    "line_total": str(item["line_total"]),
+                }
+                for item in items
+            ],
+        }
+        store.set_summary(data)
+    return CartSummary(data)
+
+
+def bump_site_setting_version():
+    versions.bump_version("site_setting")
+
+
 def get_site_setting():
-    setting, created = SiteSetting.objects.get_or_create(id=1, defaults={"delivery_fee": Decimal("0.00")})
+    # The singleton is cached per process and reloaded only when another
+    # worker (or this one) saves it and bumps the shared version key. New
+    # site-wide settings belong on SiteSetting so they ride along for free.
+    global _site_setting
+    version = versions.get_version("site_setting")
+    cached = _site_setting
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    setting = SiteSetting.objects.filter(id=1).first()
+    if setting is None:
+        setting, created = SiteSetting.objects.get_or_create(id=1, defaults={"delivery_fee": Decimal("0.00")})
+        if created:
+            version = versions.get_version("site_setting")
+    _site_setting = (version, setting)
     return setting
-
@@ -0,0 +1,41 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = "version:"
+
+
+def bump_version(name):
+    # A timestamp rather than incr(): it works on every backend, cannot
+    # collide with an older value if the key is evicted, and doubles as a
+    # last-modified time.
+    version = time.time_ns()
+    cache.set(KEY_PREFIX + name, version, None)
+    return version
+
+
+def get_version(name):
+    version = cache.get(KEY_PREFIX + name)
+    if version is None:
+        version = bump_version(name)
+    return version
+
+
+def get_versions(names):
+    found = cache.get_many([KEY_PREFIX + name for name in names])
+    return {name: found.get(KEY_PREFIX + name) or bump_version(name) for name in names}
+
+
+def cached(name, key, build, *parts):
+    # build() once per version of `name`: bumping the version orphans every
+    # entry made under the old one. Extra parts (a slug, a query) are hashed
+    # into the key so any string is safe in it.
+    digest = hashlib.md5("|".join(str(p) for p in parts).encode("utf-8")).hexdigest() if parts else "-"
+    cache_key = f"{name}:{get_version(name)}:{key}:{digest}"
+    value = cache.get(cache_key)
+    if value is None:
+        value = build()
+        cache.set(cache_key, value, settings.CATALOG_CACHE_TIMEOUT)
+    return value
@@ -1,154 +1,28 @@
+import os
 import uuid
-from decimal import Decimal
 from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
 from django.core.mail import send_mail
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.contrib import messages 
-from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
-from .models import Category, Product, Order, OrderItem, GalleryItem, Review, ContactMessage
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from .models import Product, Order, GalleryItem, Review, ContactMessage
 from .forms import CheckoutForm, ContactForm, ReviewForm
 from .utils import (
     add_to_cart_session,
     update_cart_item,
     remove_cart_item,
     clear_cart,
-    get_cart,
     get_cart_items,
+    get_cart_summary,
     get_site_setting,
-    save_cart,
 )
-from . import paynow, whatsapp
-
-
-def _send_admin_order_paid_email(order):
-    lines = [
-        f"Order reference: {order.reference}",
-        f"Name: {order.full_name}",
-        f"Phone: {order.phone}",
-        f"Email: {order.email or '(not provided)'}",
-        f"Theme: {order.theme or '-'}",
-        f"Child name: {order.child_name or '-'}",
-        f"Age: {order.age or '-'}",
-        f"Collection date: {order.collection_date or '-'}",
-        f"Toy preference: {order.toy_preference or '-'}",
-        f"Delivery: {order.delivery_method or '-'}",
-        f"Address: {order.delivery_address or '-'}",
-        "",
-        "Items:",
-    ]
-    for oi in order.items.all():
-        lines.append(f"  • {oi.product.name} x {oi.qty} @ $ {oi.unit_price} = $ {oi.line_total}")
-    lines.extend(["", f"Subtotal: $ {order.subtotal}", f"Delivery: $ {order.delivery_fee}", f"Total: $ {order.total}", "", "[PAID]"])
-    body = "\n".join(lines)
-    send_mail(
-        f"Order paid #{order.reference} – Party Fantasy ZW",
-        body,
-        settings.DEFAULT_FROM_EMAIL,
-        [settings.ADMIN_EMAIL],
-        fail_silently=True,
-    )
-
-def _send_admin_order_paid_whatsapp(order):
-    if order.status != Order.STATUS_PAID:
-        return
-    if getattr(order, "whatsapp_sent", False):
-        return
-    if not whatsapp.is_configured():
-        return
-
-    lines = [
-        "NEW PAID ORDER ✅",
-        f"Ref: {order.reference}",
-        f"Name: {order.full_name or '-'}",
-        f"Phone: {order.phone or '-'}",
-        f"Email: {order.email or '(not provided)'}",
-        f"Theme: {order.theme or '-'}",
-        f"Child: {order.child_name or '-'}",
-        f"Age: {order.age or '-'}",
-        f"Collection date: {order.collection_date or '-'}",
-        f"Toy preference: {order.toy_preference or '-'}",
-        f"Delivery: {order.delivery_method or '-'}",
-        f"Address: {order.delivery_address or '-'}",
-        "",
-        "Items:",
-    ]
-
-    for oi in order.items.all():
-        lines.append(f"- {oi.product.name} x{oi.qty} = $ {oi.line_total}")
-
-    lines.extend([
-        "",
-        f"Subtotal: $ {order.subtotal}",
-        f"Delivery: $ {order.delivery_fee}",
-        f"Total: $ {order.total}",
-    ])
-
-    msg = "\n".join(lines)
-
-    try:
-        whatsapp.send_text(settings.WA_ADMIN_TO, msg)
-        order.whatsapp_sent = True
-        order.save(update_fields=["whatsapp_sent"])
-    except Exception:
-        pass
-
-def _send_customer_order_paid_email(order):
-    if not order.email or not order.email.strip():
-        return
-    lines = [
-        f"Order reference: {order.reference}",
-        "",
-        "Order summary:",
-        f"  Subtotal:    $ {order.subtotal}",
-        f"  Delivery:    $ {order.delivery_fee}",
-        f"  Total:       $ {order.total}",
-        "",
-        "Items:",
-    ]
-    for oi in order.items.all():
-        lines.append(f"  • {oi.product.name} x {oi.qty} @ $ {oi.unit_price} = $ {oi.line_total}")
-    summary = "\n".join(lines)
-    name = (order.full_name or "there").strip() or "there"
-    body = (
-        f"Dear {name},\n\n"
-        "Thank you for your order. We have received your payment and your order is confirmed.\n\n"
-        f"{summary}\n\n"
-        "We will be in touch regarding delivery or collection. "
-        "If you have any questions, please reply to this email or contact us—we are happy to help.\n\n"
-        "Best regards,\n"
-        "The Party Fantasy ZW Team"
-    )
-    send_mail(
-        f"Order confirmed – #{order.reference} – Party Fantasy ZW",
-        body,
-        settings.DEFAULT_FROM_EMAIL,
-        [order.email.strip()],
-        fail_silently=True,
-    )
-
-
-def _send_customer_payment_failed_email(order):
-    if not order.email or not order.email.strip():
-        return
-    name = (order.full_name or "there").strip() or "there"
-    body = (
-        f"Dear {name},\n\n"
-        "We are sorry, but the payment for your order could not be completed. "
-        "Your payment may have been cancelled or declined. No charges have been made to your account.\n\n"
-        f"Order reference: {order.reference}\n\n"
-        "If you would like to complete your purchase, you can try again from the payment page or place a new order on our website. "
-        "If you need any assistance, please reply to this email or contact us—we are here to help.\n\n"
-        "Best regards,\n"
-        "The Party Fantasy ZW Team"
-    )
-    send_mail(
-        f"Payment not completed – Order #{order.reference} – Party Fantasy ZW",
-        body,
-        settings.DEFAULT_FROM_EMAIL,
-        [order.email.strip()],
-        fail_silently=True,
-    )
+from . import catalog, feedback, file_serving, orders, paynow, paynow_status, sitemaps, static_assets
 
 
 def gallery(request):
@@ -156,17 +30,7 @@ def gallery(request):
     return render(request, "gallery.html", {"items": items})
 
 
-REVIEWS_PAGE_SIZE = 10
-
-
 def reviews(request):
-    queryset = Review.objects.filter(is_visible=True).order_by("-created_at")
-    total_count = queryset.count()
-    show_all = request.GET.get("show") == "all"
-    if show_all:
-        reviews_list = list(queryset)
-    else:
-        reviews_list = list(queryset[:REVIEWS_PAGE_SIZE])
     sent = request.GET.get("sent") == "1"
     form = ReviewForm()
     if request.method == "POST":
@@ -181,35 +45,38 @@ def reviews(request):
                 is_visible=True,
             )
             return redirect(reverse("reviews") + "?sent=1")
+    cursor = request.GET.get("after", "")
+    reviews_list, next_cursor = feedback.page(cursor) if cursor else feedback.first_page()
     context = {
         "reviews_list": reviews_list,
+        "next_cursor": next_cursor,
+        "stats": feedback.get_stats(),
         "form": form,
         "sent": sent,
-        "total_count": total_count,
-        "show_all": show_all,
     }
     return render(request, "reviews.html", context)
 
 
+def reviews_more(request):
+    reviews_list, next_cursor = feedback.page(request.GET.get("after", ""))
+    html = render_to_string("includes/review_list.html", {"reviews_list": reviews_list}, request=request)
+    return JsonResponse({"html": html, "next": next_cursor})
+
+
 def home(request):
-    products = list(Product.objects.filter(is_active=True).order_by("-created_at")[:6])
-    min_price = min((p.price for p in products), default=None)
-    featured_reviews = list(Review.objects.filter(is_visible=True).order_by("-created_at")[:3])
+    products = catalog.featured_products()
+    min_price = catalog.featured_min_price()
+    featured_reviews = feedback.featured()
     return render(request, "home.html", {"featured_products": products, "min_price": min_price, "featured_reviews": featured_reviews})
 
 
 def product_list(request):
     query = request.GET.get("q", "").strip()
     category_slug = request.GET.get("category", "").strip()
-    categories = Category.objects.all().order_by("name")
-    products = Product.objects.filter(is_active=True)
-    if query:
-        products = products.filter(name__icontains=query) | products.filter(description__icontains=query)
-    if category_slug:
-        products = products.filter(category__slug=category_slug)
-    products_list = list(products.distinct().order_by("name"))
-    if category_slug:
-        get_object_or_404(Category, slug=category_slug)
+    categories = catalog.categories()
+    if category_slug and not catalog.category_exists(category_slug):
+        raise Http404("No Category matches the given query.")
+    products_list = catalog.product_list(query, category_slug)
     context = {
         "products_list": products_list,
         "categories": categories,
@@ -220,7 +87,9 @@ def product_list(request):
 
 
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug, is_active=True)
+    product = catalog.product_by_slug(slug)
+    if product is None:
+        raise Http404("No Product matches the given query.")
     if request.method == "POST":
         qty_raw = request.POST.get("qty", "10")
         try:
@@ -282,7 +151,8 @@ def cart_view(request):
 
         return redirect("cart")
 
-    items, subtotal = get_cart_items(request)
+    summary = get_cart_summary(request)
+    items, subtotal = summary.items, summary.subtotal
     setting = get_site_setting()
     delivery_fee = setting.delivery_fee
     delivery_total = subtotal + delivery_fee
@@ -295,7 +165,15 @@ def cart_view(request):
     return render(request, "cart.html", context)
 
 def checkout(request):
-    items, subtotal = get_cart_items(request)
+    if request.method == "POST":
+        existing = orders.find_by_idempotency_key(request.POST.get("idempotency_key", "").strip())
+        if existing:
+            return redirect("order_received", reference=existing.reference)
+        # Priced from the database, not the session summary, when placing the order.
+        items, subtotal = get_cart_items(request)
+    else:
+        summary = get_cart_summary(request)
+        items, subtotal = summary.items, summary.subtotal
     if not items:
         return redirect("cart")
 
@@ -309,87 +187,18 @@ def checkout(request):
         if form.is_valid():
             data = form.cleaned_data
 
-            delivery_method = data.get("delivery_method")
-            if delivery_method == "delivery":
-                delivery_fee = delivery_fee_value
-            else:
-                delivery_fee = Decimal("0.00")
-
-            total = subtotal + delivery_fee
-            reference = uuid.uuid4().hex.upper()
-
-            order = Order.objects.create(
-                reference=reference,
-                full_name=data.get("full_name") or "",
-                phone=data.get("phone") or "",
-                email=data.get("email") or "",
-                theme=data.get("theme") or "",
-                child_name=data.get("child_name") or "",
-                age=data.get("age"),
-                collection_date=data.get("collection_date"),
-                toy_preference=data.get("toy_preference") or "",
-                delivery_method=delivery_method or "",
-                delivery_address=data.get("delivery_address") or "",
-                subtotal=subtotal,
-                delivery_fee=delivery_fee,
-                total=total,
-            )
-
-            for item in items:
-                product = item["product"]
-                qty = item["qty"]
-                unit_price = product.price
-                line_total = unit_price * qty
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    qty=qty,
-                    unit_price=unit_price,
-                    line_total=line_total,
-                )
-
-            save_cart(request, get_cart(request))
-
             # -----------------------------
             # BYPASS PAYNOW FOR NOW:
-            # Send order to WhatsApp sales team
+            # The order is queued for the WhatsApp sales team; the
+            # send_notifications worker delivers it.
             # -----------------------------
-            if whatsapp.is_configured():
-                lines = [
-                    "NEW ORDER (Payment Later) 🟡",
-                    f"Ref: {order.reference}",
-                    f"Name: {order.full_name or '-'}",
-                    f"Phone: {order.phone or '-'}",
-                    f"Email: {order.email or '(not provided)'}",
-                    f"Theme: {order.theme or '-'}",
-                    f"Child: {order.child_name or '-'}",
-                    f"Age: {order.age or '-'}",
-                    f"Collection date: {order.collection_date or '-'}",
-                    f"Toy preference: {order.toy_preference or '-'}",
-                    f"Delivery: {order.delivery_method or '-'}",
-                    f"Address: {order.delivery_address or '-'}",
-                    "",
-                    "Items:",
-                ]
-
-                for oi in order.items.all():
-                    lines.append(f"- {oi.product.name} x{oi.qty} = $ {oi.line_total}")
-
-                lines.extend([
-                    "",
-                    f"Subtotal: $ {order.subtotal}",
-                    f"Delivery: $ {order.delivery_fee}",
-                    f"Total: $ {order.total}",
-                    "",
-                    "Customer message: Please confirm order on WhatsApp. Payment will be arranged after confirmation.",
-                ])
-
-                msg = "\n".join(lines)
-
-                try:
-                    whatsapp.send_text(settings.WA_ADMIN_TO, msg)
-                except Exception:
-                    pass
+            order, _created = orders.place_order(
+                items,
+                subtotal,
+                data,
+                delivery_fee_value,
+                idempotency_key=data.get("idempotency_key") or "",
+            )
 
             # previously we used messages to inform the user, but that caused
             # the same notices to appear on cart/other pages later.  Instead we
@@ -402,7 +211,7 @@ def checkout(request):
             return redirect("order_received", reference=order.reference)
 
     else:
-        form = CheckoutForm()
+        form = CheckoutForm(initial={"idempotency_key": uuid.uuid4().hex})
 
     context = {
         "form": form,
@@ -437,35 +246,19 @@ def payment_return(request):
 
 def payment_status(request, reference):
     order = get_object_or_404(Order, reference=reference)
-    was_paid = order.status == Order.STATUS_PAID
-    was_failed = order.status == Order.STATUS_FAILED
+    status = paynow_status.lookup(order)
     if request.method == "POST":
-        paynow.check_payment_status(order)
-        order.refresh_from_db()
-        if not was_paid and order.status == Order.STATUS_PAID:
-            _send_admin_order_paid_email(order)
-            _send_customer_order_paid_email(order)
-            _send_admin_order_paid_whatsapp(order)
-        if not was_failed and order.status == Order.STATUS_FAILED:
-            _send_customer_payment_failed_email(order)
         return redirect("payment_status", reference=order.reference)
-    paynow.check_payment_status(order)
-    order.refresh_from_db()
-    if not was_paid and order.status == Order.STATUS_PAID:
-        _send_admin_order_paid_email(order)
-        _send_customer_order_paid_email(order)
-        _send_admin_order_paid_whatsapp(order)
-    if not was_failed and order.status == Order.STATUS_FAILED:
-        _send_customer_payment_failed_email(order)
     context = {
         "order": order,
+        "status": status,
         "paynow_configured": paynow.is_configured(),
         "ecocash_error": request.session.pop("ecocash_error", None),
     }
-    if order.status == Order.STATUS_PAID:
+    if status == Order.STATUS_PAID:
         clear_cart(request)
         return render(request, "payment_success.html", context)
-    if order.status == Order.STATUS_FAILED:
+    if status == Order.STATUS_FAILED:
         return render(request, "payment_cancelled.html", context)
     return render(request, "payment_other.html", context)
 
@@ -510,7 +303,11 @@ def contact(request):
     return render(request, "contact.html", {"form": form, "sent": sent})
 
 
+@csrf_exempt
 def paynow_result(request):
+    # Paynow retries when the reply is slow, so answer from what it posted:
+    # verify the hash locally, apply the status with one compare-and-set
+    # UPDATE and leave notifications to the outbox worker.
     if request.method != "POST":
         return HttpResponseBadRequest("Method not allowed")
     reference = request.POST.get("reference")
@@ -518,21 +315,14 @@ def paynow_result(request):
         return HttpResponseBadRequest("Missing reference")
     if not paynow.is_configured():
         return HttpResponse("OK", status=200)
-    if not paynow.validate_result_post(request.POST, settings.PAYNOW_INTEGRATION_KEY):
+    if not paynow.validate_result_post(request.POST, paynow.integration_key()):
         return HttpResponseBadRequest("Invalid hash")
-    order = Order.objects.filter(reference=reference).first()
-    if not order:
+    status = paynow.status_from_result_post(request.POST)
+    if status is None:
         return HttpResponse("OK", status=200)
-    was_paid = order.status == Order.STATUS_PAID
-    was_failed = order.status == Order.STATUS_FAILED
-    paynow.check_payment_status(order)
-    order.refresh_from_db()
-    if not was_paid and order.status == Order.STATUS_PAID:
-        _send_admin_order_paid_email(order)
-        _send_customer_order_paid_email(order)
-        _send_admin_order_paid_whatsapp(order)
-    if not was_failed and order.status == Order.STATUS_FAILED:
-        _send_customer_payment_failed_email(order)
+    order = Order.objects.filter(reference=reference).only(*orders.TRANSITION_FIELDS).first()
+    if order and orders.transition(order, status):
+        paynow_status.invalidate(order.reference)
     return HttpResponse("OK", status=200)
 
 
@@ -547,6 +337,7 @@ def ecocash_start(request):
     if not order:
         return redirect("home")
     ok, _poll_url, _ref, err_msg = paynow.initiate_ecocash(order, phone)
+    paynow_status.invalidate(order.reference)
     if not ok:
         request.session["ecocash_error"] = err_msg or "Could not start EcoCash payment. Check the phone number and try again."
     return redirect("payment_status", reference=order.reference)
@@ -554,19 +345,9 @@ def ecocash_start(request):
 
 def paynow_status_json(request, order_reference):
     order = get_object_or_404(Order, reference=order_reference)
-    was_paid = order.status == Order.STATUS_PAID
-    was_failed = order.status == Order.STATUS_FAILED
-    paynow.check_payment_status(order)
-    order.refresh_from_db()
-    if not was_paid and order.status == Order.STATUS_PAID:
-        _send_admin_order_paid_email(order)
-        _send_customer_order_paid_email(order)
-        _send_admin_order_paid_whatsapp(order)
-    if not was_failed and order.status == Order.STATUS_FAILED:
-        _send_customer_payment_failed_email(order)
-    paid = order.status == Order.STATUS_PAID
-    status = order.status
-    message = "Paid" if paid else ("Failed or cancelled" if order.status == Order.STATUS_FAILED else "Pending")
+    status = paynow_status.lookup(order)
+    paid = status == Order.STATUS_PAID
+    message = "Paid" if paid else ("Failed or cancelled" if status == Order.STATUS_FAILED else "Pending")
     return JsonResponse({"status": status, "paid": paid, "message": message})
 
 def robots_txt(request):
@@ -578,36 +359,61 @@ def robots_txt(request):
     return HttpResponse("\n".join(lines) + "\n", content_type="text/plain")
 
 
+def _sitemap_base(request):
+    return request.build_absolute_uri("/")[:-1]
+
+
+def _sitemap_response(request, section, page, generate):
+    base = _sitemap_base(request)
+    stream = sitemaps.cached_stream(base, section, page, lambda: generate(base))
+    return StreamingHttpResponse(stream, content_type="application/xml")
+
+
+@condition(
+    etag_func=lambda request: sitemaps.etag(_sitemap_base(request), "index"),
+    last_modified_func=lambda request: sitemaps.last_modified(),
+)
 def sitemap_xml(request):
-    base = request.build_absolute_uri("/")[:-1]
-
-    urls = [
-        {"loc": f"{base}{reverse('home')}", "changefreq": "weekly", "priority": "1.0"},
-        {"loc": f"{base}{reverse('product_list')}", "changefreq": "weekly", "priority": "0.9"},
-        {"loc": f"{base}{reverse('gallery')}", "changefreq": "monthly", "priority": "0.6"},
-        {"loc": f"{base}{reverse('reviews')}", "changefreq": "monthly", "priority": "0.6"},
-        {"loc": f"{base}{reverse('about')}", "changefreq": "yearly", "priority": "0.5"},
-        {"loc": f"{base}{reverse('contact')}", "changefreq": "yearly", "priority": "0.5"},
-    ]
+    return _sitemap_response(request, "index", 0, sitemaps.index)
 
-    for p in Product.objects.filter(is_active=True).only("slug").order_by("-created_at"):
-        urls.append(
-            {
-                "loc": f"{base}{reverse('product_detail', kwargs={'slug': p.slug})}",
-                "changefreq": "weekly",
-                "priority": "0.8",
-            }
-        )
-
-    xml = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-    ]
-    for u in urls:
-        xml.append("  <url>")
-        xml.append(f"    <loc>{u['loc']}</loc>")
-        xml.append(f"    <changefreq>{u['changefreq']}</changefreq>")
-        xml.append(f"    <priority>{u['priority']}</priority>")
-        xml.append("  </url>")
-    xml.append("</urlset>")
-    return HttpResponse("\n".join(xml) + "\n", content_type="application/xml")
\ No newline at end of file
+
+@condition(
+    etag_func=lambda request: sitemaps.etag(_sitemap_base(request), "pages"),
+    last_modified_func=lambda request: sitemaps.last_modified(),
+)
+def sitemap_pages_xml(request):
+    return _sitemap_response(request, "pages", 0, sitemaps.pages)
+
+
+@condition(
+    etag_func=lambda request, page: sitemaps.etag(_sitemap_base(request), "products", page),
+    last_modified_func=lambda request, page: sitemaps.last_modified(),
+)
+def sitemap_products_xml(request, page):
+    if page < 1 or page > sitemaps.page_count():
+        raise Http404("No such sitemap page.")
+    return _sitemap_response(request, "products", page, lambda base: sitemaps.products(base, page))
+
+
+def _resolve(root, path):
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return fullpath
+
+
+def static_asset(request, path):
+    # Serves STATIC_ROOT with the .gz siblings written by optimize_static and
+    # long-lived immutable caching for fingerprinted names.
+    fullpath = _resolve(settings.STATIC_ROOT, path)
+    return file_serving.serve_file(request, fullpath, static_assets.cache_control(path), gzip=True)
+
+
+def media_file(request, path):
+    fullpath = _resolve(settings.MEDIA_ROOT, path)
+    if settings.MEDIA_SERVE_MODE in ("x-accel-redirect", "x-sendfile"):
+        return file_serving.offload_response(fullpath, path, settings.MEDIA_SERVE_MODE, settings.MEDIA_ACCEL_REDIRECT_PREFIX)
+    return file_serving.serve_file(request, fullpath, f"public, max-age={settings.MEDIA_CACHE_SECONDS}")
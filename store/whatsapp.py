@@ -1,45 +1,135 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from django.conf import settings
 
+from .http import build_session
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_client = None
+_client_lock = threading.Lock()
+
 
 def is_configured():
     return bool(settings.WA_PHONE_NUMBER_ID and settings.WA_ACCESS_TOKEN and settings.WA_ADMIN_TO)
 
 
+class WhatsAppClient:
+    def __init__(self, phone_number_id, access_token, base_url="https://graph.facebook.com/v19.0", session=None, timeout=20, max_retries=3, backoff=0.5, max_backoff=8.0):
+        self.phone_number_id = phone_number_id
+        self.access_token = access_token
+        self.base_url = base_url.rstrip("/")
+        # Any object with requests.Session's request() signature can be passed
+        # as the transport, e.g. a session pointed at a local stub server.
+        self.session = session or build_session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _sleep_before_retry(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            delay = min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+        time.sleep(delay)
+
+    def _request(self, method, url, **kwargs):
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        attempt = 0
+        while True:
+            try:
+                r = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.ConnectTimeout):
+                # Only failures before the request reached Meta. A ReadTimeout
+                # may mean the message was already sent, so it propagates and
+                # the notification outbox decides when to try again.
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+            if r.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._sleep_before_retry(attempt, r)
+                attempt += 1
+                continue
+            break
+
+        # If something is wrong, show the error body instead of silently failing
+        try:
+            data = r.json()
+        except Exception:
+            data = {"raw": r.text}
+
+        r.raise_for_status()
+        return data
+
+    def send_text(self, to_phone: str, message: str):
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": to_phone,
+            "type": "text",
+            "text": {"body": message},
+        }
+        return self._request("POST", f"{self.base_url}/{self.phone_number_id}/messages", json=payload)
+
+    def send_many(self, messages, max_workers=4):
+        # Returns one result per (to_phone, message) pair, in order: the API
+        # response, or the exception raised for that message.
+        def send(item):
+            try:
+                return self.send_text(*item)
+            except Exception as e:
+                return e
+
+        messages = list(messages)
+        if max_workers <= 1 or len(messages) <= 1:
+            return [send(item) for item in messages]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(send, messages))
+
+    def debug_phone_number(self):
+        return self._request("GET", f"{self.base_url}/{self.phone_number_id}")
+
+    def close(self):
+        self.session.close()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WhatsAppClient(
+                settings.WA_PHONE_NUMBER_ID,
+                settings.WA_ACCESS_TOKEN,
+                base_url=settings.WA_API_BASE_URL,
+                session=build_session(settings.WA_HTTP_POOL_SIZE),
+                timeout=settings.WA_HTTP_TIMEOUT,
+                max_retries=settings.WA_MAX_RETRIES,
+            )
+        return _client
+
+
+def reset_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
 def send_text(to_phone: str, message: str):
-    url = f"https://graph.facebook.com/v19.0/{settings.WA_PHONE_NUMBER_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {settings.WA_ACCESS_TOKEN}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "messaging_product": "whatsapp",
-        "to": to_phone,
-        "type": "text",
-        "text": {"body": message},
-    }
-
-    r = requests.post(url, headers=headers, json=payload, timeout=20)
-
-    # If something is wrong, show the error body instead of silently failing
-    try:
-        data = r.json()
-    except Exception:
-        data = {"raw": r.text}
-
-    r.raise_for_status()
-    return data
+    return get_client().send_text(to_phone, message)
 
-def debug_phone_number():
-    url = f"https://graph.facebook.com/v19.0/{settings.WA_PHONE_NUMBER_ID}"
-    headers = {"Authorization": f"Bearer {settings.WA_ACCESS_TOKEN}"}
 
-    r = requests.get(url, headers=headers, timeout=20)
+def send_many(messages, max_workers=4):
+    return get_client().send_many(messages, max_workers=max_workers)
 
-    try:
-        data = r.json()
-    except Exception:
-        data = {"raw": r.text}
 
-    r.raise_for_status()
-    return data
\ No newline at end of file
+def debug_phone_number():
+    return get_client().debug_phone_number()